@@ -5,11 +5,13 @@ Enhanced with SpoonOS Agent Integration
 
 import os
 import asyncio
+import copy
 import hashlib
 import json
+import random
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import logging
@@ -35,17 +37,46 @@ try:
 except ImportError:
     SKLEARN_AVAILABLE = False
 
+try:
+    from cli.config import ConfigManager
+except ImportError:
+    ConfigManager = None
+
+# orjson decodes LLM output several times faster; it raises a subclass of
+# json.JSONDecodeError so existing handlers keep working
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Handle different OpenAI library versions
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
+    from openai import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+    import httpx  # installed with openai>=1.0
     OPENAI_V1 = True
+    RETRYABLE_ERRORS: Tuple[type, ...] = (
+        RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+    )
+    from openai import BadRequestError
+    BAD_REQUEST_ERRORS: Tuple[type, ...] = (BadRequestError,)
 except ImportError:
     try:
         import openai
         OPENAI_V1 = False
+        RETRYABLE_ERRORS = (
+            openai.error.RateLimitError,
+            openai.error.Timeout,
+            openai.error.APIConnectionError,
+            openai.error.ServiceUnavailableError,
+        )
+        BAD_REQUEST_ERRORS = (openai.error.InvalidRequestError,)
     except ImportError:
         openai = None
         OPENAI_V1 = False
+        RETRYABLE_ERRORS = ()
+        BAD_REQUEST_ERRORS = ()
 
 # Try to import SpoonOS components
 SPOON_AVAILABLE = False
@@ -64,6 +95,43 @@ except ImportError:
 from analysis.parser import SolidityParser, ParsedContract
 from analysis.static_scanner import StaticScanner, StaticFinding
 
+# Bump whenever the prompts or response parsing change so cached AI results
+# from older prompts are not reused.
+PROMPT_VERSION = "3"
+
+# Structured-output schema for OpenAI responses; mirrors AIFinding
+FINDING_SCHEMA: Dict[str, Any] = {
+    "name": "findings",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "findings": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "severity": {"type": "string", "enum": ["critical", "high", "medium", "low", "info"]},
+                        "title": {"type": "string"},
+                        "description": {"type": "string"},
+                        "location": {"type": "string"},
+                        "confidence": {"type": "number"},
+                        "reasoning": {"type": "string"},
+                        "suggested_fix": {"type": ["string", "null"]},
+                    },
+                    "required": [
+                        "severity", "title", "description", "location",
+                        "confidence", "reasoning", "suggested_fix",
+                    ],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["findings"],
+        "additionalProperties": False,
+    },
+}
+
 @dataclass
 class AIFinding:
     severity: str
@@ -74,6 +142,16 @@ class AIFinding:
     reasoning: str
     suggested_fix: Optional[str] = None
 
+class IncompleteAnalysisError(RuntimeError):
+    """
+    The model's response broke off after some findings had arrived (dropped
+    stream, read timeout, truncated output). findings holds what was
+    received; it is usable for this run but must not be cached as complete.
+    """
+    def __init__(self, message: str, findings: Optional[List[AIFinding]] = None):
+        super().__init__(message)
+        self.findings: List[AIFinding] = findings or []
+
 @dataclass
 class PipelineConfig:
     """Configuration for analysis pipeline"""
@@ -200,6 +278,237 @@ class SpoonContractAgent(ToolCallAgent):
         
         super().__init__(available_tools=tools, llm=llm, **kwargs)
 
+_STRUCTURED_OUTPUT_TERMS = ("response_format", "json_schema", "structured output")
+
+def _mentions_structured_output(error: Exception) -> bool:
+    """Whether a rejected request's error points at response_format"""
+    param = getattr(error, "param", None)
+    if isinstance(param, str) and param.startswith("response_format"):
+        return True
+    text = str(error).lower()
+    return any(term in text for term in _STRUCTURED_OUTPUT_TERMS)
+
+def _env_limit(name: str) -> Optional[int]:
+    """Positive integer from the environment; unset, blank or invalid means no limit"""
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        print(f"[ai] Ignoring non-numeric {name}={raw!r}")
+        return None
+    return value if value > 0 else None
+
+class AsyncTokenBucket:
+    """
+    Client-side rate limiter enforcing requests-per-minute and tokens-per-minute
+    budgets. Both buckets refill continuously on a monotonic clock; a limit of
+    None disables that bucket.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._last = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    async def consume(self, tokens: int) -> None:
+        """Wait until one request and `tokens` tokens are available, then take them"""
+        if self.tpm:
+            # An oversized request can never fit; let it through on a full bucket
+            tokens = min(tokens, self.tpm)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60.0 / self.rpm)
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60.0 / self.tpm)
+                if wait <= 0:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    return
+                await asyncio.sleep(wait)
+
+class _FindingScanner:
+    """
+    Incremental reader for the first JSON array in a streamed completion.
+    feed() returns each top-level object of that array once it has closed,
+    so findings can be used before the rest of the response arrives.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos: Optional[int] = None  # just past the last consumed element
+        self._decoder = json.JSONDecoder()
+        self.done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self._buf += text
+        items: List[Dict[str, Any]] = []
+        if self._pos is None:
+            start = self._buf.find("[")
+            if start == -1:
+                return items
+            self._pos = start + 1
+        elif "}" not in text and "]" not in text:
+            return items  # nothing can have closed since the last feed
+
+        buf = self._buf
+        while not self.done:
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            self._pos = pos
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                self.done = True
+                break
+            try:
+                obj, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element still incomplete
+            self._pos = end
+            if isinstance(obj, dict):
+                items.append(obj)
+        return items
+
+
+# Filled by _build_prompt via str.format; literal braces are doubled
+_PROMPT_TPL = """Analyze this Solidity contract '{name}' for security vulnerabilities and provide a comprehensive security assessment.
+
+STATIC ANALYSIS RESULTS:
+{static_summary}
+
+CONTRACT SOURCE CODE:
+```solidity
+{code_snippet}
+```
+
+Please analyze the code for:
+1. Reentrancy vulnerabilities
+2. Access control issues  
+3. Integer overflow/underflow
+4. Unchecked external calls
+5. Gas optimization issues
+6. Logic errors
+7. Front-running vulnerabilities
+8. Any other security concerns
+
+Respond with a JSON object {{"findings": [...]}}. Each finding should have:
+- severity: "critical", "high", "medium", "low", or "info"
+- title: Brief descriptive title
+- description: Detailed explanation of the vulnerability
+- location: File location (use contract name if line unknown, e.g. "{name}:25-30")
+- confidence: Float between 0.0-1.0 indicating certainty
+- reasoning: Why this is a vulnerability
+- suggested_fix: How to fix it, or null"""
+
+_SNIPPET_BUDGET = 2500
+_SNIPPET_SEP = "\n// ...\n"
+
+
+def _finding_line(f: StaticFinding) -> Optional[int]:
+    if f.line:
+        return f.line
+    tail = f.location.rsplit(":", 1)[-1]
+    return int(tail) if tail.isdigit() and int(tail) > 0 else None
+
+
+def _in_file(f: StaticFinding, contract_path: str) -> bool:
+    """
+    Whether a finding's location ("<file>:<line>") names contract_path. The
+    file part may be a bare name, a relative or an absolute path; it must
+    match the tail of contract_path. Locations without a file part match.
+    """
+    if ":" not in f.location:
+        return True
+    prefix = f.location.rsplit(":", 1)[0]
+    wanted = tuple(p for p in Path(prefix).parts if p not in (".", ".."))
+    if not wanted:
+        return True
+    parts = Path(contract_path).resolve().parts
+    return parts[-len(wanted):] == wanted
+
+
+def _slice_relevant(
+    source: str,
+    functions: List[Dict[str, Any]],
+    static_results: Dict[str, List[StaticFinding]],
+    budget: int = _SNIPPET_BUDGET,
+    contract_path: Optional[str] = None,
+) -> str:
+    """
+    Source of the functions enclosing static findings, joined with "// ..."
+    separators and capped at budget characters. Falls back to the head of
+    the file when no finding maps onto a function with a solc src range.
+    With contract_path, findings located in other files are ignored, since
+    a directory scan hands every contract the merged results of all files.
+    """
+    lines = {ln for bucket in static_results.values() for f in bucket
+             if contract_path is None or _in_file(f, contract_path)
+             for ln in (_finding_line(f),) if ln}
+    ranges = []
+    for fn in functions:
+        parts = fn.get("src", "").split(":")
+        if len(parts) >= 2 and parts[0].isdigit() and parts[1].isdigit():
+            ranges.append((int(parts[0]), int(parts[1])))
+    if not lines or not ranges:
+        return source[:budget]
+
+    # solc src offsets are byte offsets into the UTF-8 source
+    data = source.encode("utf-8")
+    line_starts = [0]
+    pos = data.find(b"\n")
+    while pos != -1:
+        line_starts.append(pos + 1)
+        pos = data.find(b"\n", pos + 1)
+
+    picked = set()
+    for ln in lines:
+        if ln > len(line_starts):
+            continue
+        line_start = line_starts[ln - 1]
+        line_end = line_starts[ln] if ln < len(line_starts) else len(data)
+        # overlap rather than containment: the declaration line starts before the function's src
+        enclosing = [r for r in ranges if r[0] < line_end and line_start < r[0] + r[1]]
+        if enclosing:
+            picked.add(min(enclosing, key=lambda r: r[1]))
+    if not picked:
+        return source[:budget]
+
+    pieces = [data[start:start + length].decode("utf-8", "ignore") for start, length in sorted(picked)]
+    return _SNIPPET_SEP.join(pieces)[:budget]
+
+
+def _summarize_static(static_results: Dict[str, List[StaticFinding]]) -> str:
+    """One line per static finding, as embedded in the AI prompts"""
+    lines = []
+    for bucket in static_results.values():
+        for f in bucket:
+            lines.append(f"- [{f.severity.upper()}] {f.title} at {f.location}: {f.tool}")
+    return "\n".join(lines) or "No static findings detected."
+
+
 class AIAnalyzer:
     """
     Enhanced AI analyzer supporting both direct OpenAI and SpoonOS agents.
@@ -211,7 +520,10 @@ class AIAnalyzer:
         self.spoon_agent_type = spoon_agent_type
         
         # OpenAI configuration
-        self.openai_key = os.getenv("OPENAI_API_KEY")
+        if ConfigManager is not None:
+            self.openai_key = ConfigManager().get("openai_key")
+        else:
+            self.openai_key = os.getenv("OPENAI_API_KEY")
         self.base_url = os.getenv("BASE_URL", "https://api.openai.com/v1")
         self.model_name = os.getenv("MODEL_NAME", "gpt-4")
         
@@ -220,8 +532,14 @@ class AIAnalyzer:
         self.spoon_model = os.getenv("SPOON_MODEL", "anthropic/claude-3-5-sonnet-20241022")
         self.spoon_base_url = os.getenv("SPOON_BASE_URL", "https://openrouter.ai/api/v1")
         
-        # Initialize OpenAI client
+        # Initialize OpenAI clients (sync for analyze, async for analyze_async).
+        # The async client and its connection pool are only built by
+        # _async_client(), so sync-only callers never open one.
         self.openai_client = None
+        self.aclient = None
+        self._http = None
+        # json_schema response_format; switched off on the first rejection
+        self._structured_output = OPENAI_V1
         if self.openai_key and not use_spoon_agent:
             if OPENAI_V1:
                 self.openai_client = OpenAI(
@@ -233,6 +551,21 @@ class AIAnalyzer:
                 if self.base_url != "https://api.openai.com/v1":
                     openai.api_base = self.base_url
                 self.openai_client = openai
+                # Legacy SDK exposes ChatCompletion.acreate on the module itself
+                self.aclient = openai
+
+        # Spoon agents keep per-run state (clear() + run()), so concurrent
+        # analyze_async calls must take turns on the shared agent.
+        self._spoon_lock: Optional[asyncio.Lock] = None
+
+        # analyze_async calls whose prompt matches one already in flight
+        # (e.g. vendored copies of the same contract) await that call instead
+        self._inflight: Dict[str, "asyncio.Task[List[AIFinding]]"] = {}
+
+        # Optional client-side throttling for analyze_async (OPENAI_RPM / OPENAI_TPM)
+        rpm = _env_limit("OPENAI_RPM")
+        tpm = _env_limit("OPENAI_TPM")
+        self._bucket = AsyncTokenBucket(rpm, tpm) if (rpm or tpm) else None
 
         inferred = "openrouter" if "openrouter" in (self.spoon_base_url or "").lower() else "openai"
         # Initialize SpoonOS agent
@@ -347,16 +680,15 @@ class AIAnalyzer:
         self,
         contract_path: str,
         parsed: ParsedContract,
-        static_results: Dict[str, List[StaticFinding]]
+        static_results: Dict[str, List[StaticFinding]],
+        static_summary: Optional[str] = None,
     ) -> List[AIFinding]:
         findings: List[AIFinding] = []
 
         # Prepare contract snippet and static context
-        snippet = parsed.source_code[:2500]
-        static_summary = "\n".join(
-            f"- [{f.severity.upper()}] {f.title} at {f.location}: {f.tool}"
-            for bucket in static_results.values() for f in bucket
-        ) or "No static findings detected."
+        snippet = self._snippet(contract_path, parsed, static_results)
+        if static_summary is None:
+            static_summary = _summarize_static(static_results)
 
         # Use SpoonOS agent if configured
         if self.use_spoon_agent and self.spoon_agent:
@@ -376,52 +708,365 @@ class AIAnalyzer:
         # Fallback to direct OpenAI if SpoonOS fails or not configured
         if not findings and self.openai_client:
             try:
-                prompt = self._build_prompt(parsed.name, snippet, static_results)
-                
-                if OPENAI_V1:
-                    resp = self.openai_client.chat.completions.create(
-                        model=self.model_name,
-                        messages=[
-                            {"role": "system", "content": "You are an expert Solidity security auditor. Analyze smart contracts for vulnerabilities and provide detailed findings in JSON format."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        max_tokens=2000,
-                        temperature=0.1
-                    )
-                    content = resp.choices[0].message.content
-                else:
-                    resp = self.openai_client.ChatCompletion.create(
-                        model=self.model_name,
-                        messages=[
-                            {"role": "system", "content": "You are an expert Solidity security auditor. Analyze smart contracts for vulnerabilities and provide detailed findings in JSON format."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        max_tokens=2000,
-                        temperature=0.1
-                    )
-                    content = resp.choices[0].message.content
-                
+                prompt = self._build_prompt(parsed.name, snippet, static_results, static_summary)
+
+                request = self._openai_request(prompt)
+                create = (
+                    self.openai_client.chat.completions.create if OPENAI_V1
+                    else self.openai_client.ChatCompletion.create
+                )
+                try:
+                    resp = create(**request)
+                except BAD_REQUEST_ERRORS as e:
+                    if not self._drop_structured_output(request, e):
+                        raise
+                    resp = create(**request)
+                content = resp.choices[0].message.content
+
                 ai_findings = self._parse_openai_response(content)
                 findings.extend(ai_findings)
                 if self.debug:
                     print(f"[ai] OpenAI found {len(ai_findings)} issues")
-                    
+
             except Exception as e:
                 if self.debug:
                     print(f"[ai] OpenAI error: {e}")
 
         return findings
 
+    def prompt_digest(
+        self,
+        contract_path: str,
+        parsed: ParsedContract,
+        static_results: Dict[str, List[StaticFinding]],
+        static_summary: Optional[str] = None,
+    ) -> str:
+        """
+        SHA-256 of what the prompt is built from: contract name, code snippet
+        and static summary. The model is fixed per analyzer, and contract_path
+        only matters through the snippet. Identifies both in-flight duplicates
+        and cached results that still match their inputs.
+        """
+        if static_summary is None:
+            static_summary = _summarize_static(static_results)
+        snippet = self._snippet(contract_path, parsed, static_results)
+        return hashlib.sha256(
+            "\0".join((parsed.name, snippet, static_summary)).encode("utf-8")
+        ).hexdigest()
+
+    async def analyze_async(
+        self,
+        contract_path: str,
+        parsed: ParsedContract,
+        static_results: Dict[str, List[StaticFinding]],
+        static_summary: Optional[str] = None,
+    ) -> List[AIFinding]:
+        """
+        Non-blocking variant of analyze() for use inside a running event loop.
+        Safe to fan out with asyncio.gather; Spoon agent runs are serialized and
+        concurrent calls with an identical prompt share a single request.
+        Raises IncompleteAnalysisError, carrying the partial findings, when the
+        response broke off mid-way.
+        """
+        if static_summary is None:
+            static_summary = _summarize_static(static_results)
+        key = self.prompt_digest(contract_path, parsed, static_results, static_summary)
+
+        task = self._inflight.get(key)
+        if task is None:
+            async def _collect() -> List[AIFinding]:
+                findings: List[AIFinding] = []
+                try:
+                    async for f in self.analyze_stream(
+                        contract_path, parsed, static_results, static_summary
+                    ):
+                        findings.append(f)
+                except IncompleteAnalysisError as e:
+                    e.findings = findings
+                    raise
+                return findings
+            task = asyncio.ensure_future(_collect())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        elif self.debug:
+            print(f"[ai] Reusing in-flight analysis for identical prompt ({parsed.name})")
+
+        # shield: one caller being cancelled must not cancel the shared call
+        try:
+            findings = await asyncio.shield(task)
+        except IncompleteAnalysisError as e:
+            raise IncompleteAnalysisError(str(e), copy.deepcopy(e.findings)) from e
+        return copy.deepcopy(findings)
+
+    async def analyze_stream(
+        self,
+        contract_path: str,
+        parsed: ParsedContract,
+        static_results: Dict[str, List[StaticFinding]],
+        static_summary: Optional[str] = None,
+    ) -> AsyncIterator[AIFinding]:
+        """
+        Yield findings as they arrive. With the openai>=1.0 SDK the completion
+        is streamed and each finding is emitted as soon as its JSON object
+        closes; otherwise findings are yielded once the full response is in.
+        If the stream breaks off after findings were yielded, raises
+        IncompleteAnalysisError instead of ending as if it were complete.
+        """
+        snippet = self._snippet(contract_path, parsed, static_results)
+        if static_summary is None:
+            static_summary = _summarize_static(static_results)
+
+        found = False
+        if self.use_spoon_agent and self.spoon_agent:
+            if self._spoon_lock is None:
+                self._spoon_lock = asyncio.Lock()
+            try:
+                async with self._spoon_lock:
+                    spoon_findings = await self._analyze_with_spoon_agent_async(
+                        parsed.name, snippet, static_summary
+                    )
+                if self.debug:
+                    print(f"[ai] SpoonOS agent found {len(spoon_findings)} issues")
+                for f in spoon_findings:
+                    found = True
+                    yield f
+            except Exception as e:
+                if self.debug:
+                    print(f"[ai] SpoonOS agent error: {e}")
+
+        aclient = self._async_client()
+        if found or not aclient:
+            return
+
+        count = 0
+        try:
+            prompt = self._build_prompt(parsed.name, snippet, static_results, static_summary)
+            request = self._openai_request(prompt)
+            # Rough estimate (~4 chars/token) plus the completion budget
+            estimated_tokens = len(prompt) // 4 + request["max_tokens"]
+            if OPENAI_V1:
+                request["stream"] = True
+
+            async def _request():
+                if self._bucket:
+                    await self._bucket.consume(estimated_tokens)
+                if OPENAI_V1:
+                    return await aclient.chat.completions.create(**request)
+                return await aclient.ChatCompletion.acreate(**request)
+
+            # Only opening the request is retried; a stream that breaks
+            # mid-way keeps whatever findings it already produced
+            try:
+                resp = await self._call_with_retry(_request)
+            except BAD_REQUEST_ERRORS as e:
+                if not self._drop_structured_output(request, e):
+                    raise
+                resp = await self._call_with_retry(_request)
+
+            if not OPENAI_V1:
+                for f in self._parse_openai_response(resp.choices[0].message.content):
+                    count += 1
+                    yield f
+                return
+
+            scanner = _FindingScanner()
+            try:
+                async for chunk in resp:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    for item in scanner.feed(delta):
+                        finding = self._item_to_finding(item)
+                        if finding:
+                            count += 1
+                            yield finding
+                    if scanner.done:
+                        break
+            except Exception as e:
+                if count:
+                    raise IncompleteAnalysisError(f"stream broke off after {count} findings: {e}") from e
+                raise
+            finally:
+                close = getattr(resp, "close", None)
+                if close:
+                    await close()
+            if count and not scanner.done:
+                # e.g. the completion hit max_tokens before the array closed
+                raise IncompleteAnalysisError(f"response ended after {count} findings without closing")
+        except IncompleteAnalysisError:
+            raise
+        except Exception as e:
+            if self.debug:
+                print(f"[ai] OpenAI error: {e}")
+        finally:
+            if self.debug:
+                print(f"[ai] OpenAI found {count} issues")
+
+    async def _call_with_retry(self, coro_factory, attempts: int = 3, base_delay: float = 1.0):
+        """
+        Await coro_factory() up to `attempts` times, backing off exponentially
+        (with jitter) on rate limits, timeouts, connection errors and 5xx.
+        """
+        last_exc: Optional[BaseException] = None
+        for attempt in range(attempts):
+            try:
+                return await coro_factory()
+            except RETRYABLE_ERRORS + (asyncio.TimeoutError,) as e:
+                last_exc = e
+                if self.debug:
+                    print(f"[ai] Retryable error (attempt {attempt + 1}/{attempts}): {e}")
+                if attempt < attempts - 1:
+                    await asyncio.sleep(base_delay * 2 ** attempt + random.uniform(0, base_delay))
+        if last_exc:
+            raise last_exc
+        raise RuntimeError("AI request failed after all retry attempts")
+
+    async def analyze_batch(
+        self,
+        items: List[Tuple[str, ParsedContract, Dict[str, List[StaticFinding]]]],
+        poll_interval: float = 30.0,
+    ) -> Tuple[str, List[List[AIFinding]]]:
+        """
+        Submit one OpenAI Batch API job covering every (path, contract, static)
+        item and wait for it to finish.
+
+        Returns:
+            (batch_id, findings) where findings[i] belongs to items[i]
+        """
+        aclient = self._async_client()
+        if not (OPENAI_V1 and aclient):
+            raise RuntimeError("Batch analysis requires the openai>=1.0 SDK and OPENAI_API_KEY")
+
+        lines = []
+        summaries: Dict[str, str] = {}  # contracts from one file share its static results
+        for i, (path, parsed, static_results) in enumerate(items):
+            if path not in summaries:
+                summaries[path] = _summarize_static(static_results)
+            prompt = self._build_prompt(
+                parsed.name, self._snippet(path, parsed, static_results), static_results, summaries[path]
+            )
+            lines.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._openai_request(prompt),
+            }))
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+        input_file = await aclient.files.create(
+            file=("contracts.jsonl", payload), purpose="batch"
+        )
+        batch = await aclient.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        if self.debug:
+            print(f"[ai] Submitted batch {batch.id} with {len(items)} requests")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await aclient.batches.retrieve(batch.id)
+            if self.debug:
+                print(f"[ai] Batch {batch.id} status: {batch.status}")
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} finished with status '{batch.status}'")
+
+        output = await aclient.files.content(batch.output_file_id)
+        findings: List[List[AIFinding]] = [[] for _ in items]
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                if self.debug:
+                    print(f"[ai] Batch request {record.get('custom_id')} failed: {record.get('error')}")
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            findings[int(record["custom_id"])] = self._parse_openai_response(content)
+
+        return batch.id, findings
+
+    def _async_client(self) -> Any:
+        """The async OpenAI client, created on first use; None without an API key."""
+        if self.aclient is None and OPENAI_V1 and self.openai_key and not self.use_spoon_agent:
+            # One pooled connection set shared by every concurrent request,
+            # so keep-alive connections skip the TLS handshake
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+            # Retries are handled by _call_with_retry so they also respect the bucket
+            self.aclient = AsyncOpenAI(
+                api_key=self.openai_key,
+                base_url=self.base_url,
+                max_retries=0,
+                http_client=self._http,
+            )
+        return self.aclient
+
+    async def aclose(self) -> None:
+        """Release the async OpenAI client's connection pool, if one was opened."""
+        if OPENAI_V1 and self.aclient is not None:
+            await self.aclient.close()
+            self.aclient = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _openai_request(self, prompt: str) -> Dict[str, Any]:
+        """Chat Completions arguments shared by the sync and async paths"""
+        request = {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": "You are an expert Solidity security auditor. Analyze smart contracts for vulnerabilities and provide detailed findings in JSON format."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 2000,
+            "temperature": 0.1,
+        }
+        if self._structured_output:
+            request["response_format"] = {"type": "json_schema", "json_schema": FINDING_SCHEMA}
+        return request
+
+    def _drop_structured_output(self, request: Dict[str, Any], error: Exception) -> bool:
+        """
+        Called when a request is rejected. If it used structured output and
+        the error is about it, turn that off for this analyzer (model or
+        endpoint lacks json_schema support) and strip it from request so the
+        caller can resend.
+        """
+        if "response_format" not in request or not _mentions_structured_output(error):
+            # e.g. context length or content errors: resending without the schema won't help
+            return False
+        if self.debug:
+            print(f"[ai] Structured output rejected, falling back to plain JSON: {error}")
+        self._structured_output = False
+        request.pop("response_format")
+        return True
+
     def _analyze_with_spoon_agent(self, contract_name: str, code_snippet: str, static_summary: str) -> List[AIFinding]:
         """Analyze using SpoonOS agent"""
         if not self.spoon_agent:
             return []
-        
+        return self._arun(
+            self._analyze_with_spoon_agent_async(contract_name, code_snippet, static_summary)
+        )
+
+    async def _analyze_with_spoon_agent_async(self, contract_name: str, code_snippet: str, static_summary: str) -> List[AIFinding]:
+        """Analyze using SpoonOS agent, awaiting the agent's async run()"""
+        if not self.spoon_agent:
+            return []
+
         try:
             # Clear agent state
             self.spoon_agent.clear()
-            
-            
+
+
             # Build analysis prompt
             prompt = f"""You are an expert Solidity security auditor. Your task is to analyze the provided smart contract and return a JSON array of security findings.
 
@@ -471,7 +1116,7 @@ Begin your analysis now and return ONLY the JSON array."""
             # Run agent analysis
             # if hasattr(self.spoon_agent, 'run_sync'):
             #     response = self.spoon_agent.run_sync(prompt)
-            raw = self._arun(self.spoon_agent.run(prompt))
+            raw = await self.spoon_agent.run(prompt)
             response = self._to_text(raw)
             # else:
             #     import asyncio
@@ -496,7 +1141,7 @@ Begin your analysis now and return ONLY the JSON array."""
 
 Respond with JSON array format like this:
 [{{"severity": "high", "title": "Issue name", "description": "Issue details", "location": "function name", "confidence": 0.8, "reasoning": "why it's an issue", "suggested_fix": "how to fix"}}]"""
-                raw2 = self._arun(self.spoon_agent.run(direct_prompt))
+                raw2 = await self.spoon_agent.run(direct_prompt)
                 response2 = self._to_text(raw2)
                 if self.debug:
                     print("[ai] Spoon strict response (truncated):", response2[:400])
@@ -669,60 +1314,37 @@ Respond with JSON array format like this:
         
         return findings
 
+    def _snippet(self, contract_path: str, parsed: ParsedContract,
+                 static_results: Dict[str, List[StaticFinding]]) -> str:
+        """Contract source included in the prompt: the flagged functions, or the file head"""
+        return _slice_relevant(parsed.source_code, parsed.functions, static_results,
+                               contract_path=contract_path)
+
     def _build_prompt(
         self,
         name: str,
         code_snippet: str,
-        static_results: Dict[str, List[StaticFinding]]
+        static_results: Dict[str, List[StaticFinding]],
+        static_summary: Optional[str] = None,
     ) -> str:
-        static_summary = "\n".join(
-            f"- [{f.severity.upper()}] {f.title} at {f.location}: {f.tool}"
-            for bucket in static_results.values() for f in bucket
-        ) or "No static findings detected."
-        
-        return f"""Analyze this Solidity contract '{name}' for security vulnerabilities and provide a comprehensive security assessment.
-
-STATIC ANALYSIS RESULTS:
-{static_summary}
-
-CONTRACT SOURCE CODE:
-```solidity
-{code_snippet}
-```
-
-Please analyze the code for:
-1. Reentrancy vulnerabilities
-2. Access control issues  
-3. Integer overflow/underflow
-4. Unchecked external calls
-5. Gas optimization issues
-6. Logic errors
-7. Front-running vulnerabilities
-8. Any other security concerns
-
-Respond with a JSON array containing detailed findings. Each finding should have:
-- severity: "critical", "high", "medium", "low", or "info"
-- title: Brief descriptive title
-- description: Detailed explanation of the vulnerability
-- location: File location (use contract name if line unknown)
-- confidence: Float between 0.0-1.0 indicating certainty
-- reasoning: Why this is a vulnerability
-- suggested_fix: How to fix it (optional)
-
-Example format:
-[
-  {{
-    "severity": "high",
-    "title": "Reentrancy vulnerability in withdraw function",
-    "description": "The withdraw function makes external calls before updating state, allowing for reentrancy attacks",
-    "location": "{name}:25-30",
-    "confidence": 0.9,
-    "reasoning": "External call to user.call{{value: amount}}() occurs before balance update",
-    "suggested_fix": "Use checks-effects-interactions pattern: update state before external calls"
-  }}
-]
+        if static_summary is None:
+            static_summary = _summarize_static(static_results)
+        return _PROMPT_TPL.format(
+            name=name, static_summary=static_summary, code_snippet=code_snippet
+        )
 
-IMPORTANT: Return ONLY the JSON array, no additional text."""
+    def _item_to_finding(self, item: Any) -> Optional[AIFinding]:
+        if not isinstance(item, dict):
+            return None
+        return AIFinding(
+            severity=item.get("severity", "medium").lower(),
+            title=item.get("title", "Unknown vulnerability"),
+            description=item.get("description", ""),
+            location=item.get("location", "Unknown"),
+            confidence=float(item.get("confidence", 0.5)),
+            reasoning=item.get("reasoning", ""),
+            suggested_fix=item.get("suggested_fix")
+        )
 
     def _parse_openai_response(self, content: str) -> List[AIFinding]:
         findings: List[AIFinding] = []
@@ -730,7 +1352,20 @@ IMPORTANT: Return ONLY the JSON array, no additional text."""
             if self.debug:
                 print("[ai] Empty response from OpenAI")
             return findings
-            
+
+        # Structured output: the body is exactly {"findings": [...]}
+        try:
+            data = orjson.loads(content) if ORJSON_AVAILABLE else json.loads(content)
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict) and isinstance(data.get("findings"), list):
+            for item in data["findings"]:
+                finding = self._item_to_finding(item)
+                if finding:
+                    findings.append(finding)
+            return findings
+
+        # Otherwise carve the JSON array out of free-form text
         try:
             # Clean the response - remove markdown formatting if present
             cleaned_content = content.strip()
@@ -751,7 +1386,7 @@ IMPORTANT: Return ONLY the JSON array, no additional text."""
                 return findings
                 
             json_str = cleaned_content[start:end]
-            arr = json.loads(json_str)
+            arr = orjson.loads(json_str) if ORJSON_AVAILABLE else json.loads(json_str)
             
             if not isinstance(arr, list):
                 if self.debug:
@@ -759,18 +1394,9 @@ IMPORTANT: Return ONLY the JSON array, no additional text."""
                 return findings
             
             for item in arr:
-                if not isinstance(item, dict):
-                    continue
-                    
-                findings.append(AIFinding(
-                    severity=item.get("severity", "medium").lower(),
-                    title=item.get("title", "Unknown vulnerability"),
-                    description=item.get("description", ""),
-                    location=item.get("location", "Unknown"),
-                    confidence=float(item.get("confidence", 0.5)),
-                    reasoning=item.get("reasoning", ""),
-                    suggested_fix=item.get("suggested_fix")
-                ))
+                finding = self._item_to_finding(item)
+                if finding:
+                    findings.append(finding)
                 
         except json.JSONDecodeError as e:
             if self.debug:
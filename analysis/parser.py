@@ -1,12 +1,17 @@
 import re
 import json
+import hashlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
 
 
 try:
-    from solcx import compile_source, compile_files, install_solc, set_solc_version
+    from solcx import (
+        compile_source, compile_files, compile_standard,
+        get_installed_solc_versions, install_solc, set_solc_version,
+    )
     from solcx.exceptions import SolcError
     SOLCX_AVAILABLE = True
 except ImportError:
@@ -15,6 +20,80 @@ except ImportError:
     class SolcError(Exception):
         pass
 
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    diskcache = None
+    DISKCACHE_AVAILABLE = False
+
+# Compiled artifacts keyed by "<sha256 of source>:<solc version>", shared by
+# every SolidityParser in the process (LRU) and across runs (on disk).
+SOLC_CACHE_DIR = Path("~/.spoon-audit/cache/solc").expanduser()
+_MEMORY_CACHE_SIZE = 128
+_memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_disk_cache: Any = None
+
+# solc versions known to be installed (seeded from solcx at import), and the
+# one solcx currently targets
+_INSTALLED: Set[str] = set()
+if SOLCX_AVAILABLE:
+    try:
+        _INSTALLED.update(str(v) for v in get_installed_solc_versions())
+    except Exception:
+        pass
+_ACTIVE_SOLC: Optional[str] = None
+
+_DEF_NODE_TYPES = frozenset({"FunctionDefinition", "EventDefinition", "ModifierDefinition"})
+_PRAGMA_RE = re.compile(r'pragma\s+solidity\s+[\^~]?(\d+\.\d+\.\d+)')
+_PRAGMA_HEAD = 512  # pragma normally sits in the file header
+_IMPORT_RE = re.compile(r'import\s+(?:[^;]*?\bfrom\s+)?["\']([^"\']+)["\']')
+
+
+def _get_disk_cache() -> Optional[Any]:
+    global _disk_cache
+    if _disk_cache is None:
+        _disk_cache = False
+        if DISKCACHE_AVAILABLE:
+            try:
+                _disk_cache = diskcache.Cache(str(SOLC_CACHE_DIR))
+            except Exception:
+                pass
+    return None if _disk_cache is False else _disk_cache
+
+
+def _load_artifacts(key: str) -> Optional[Dict[str, Any]]:
+    if key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return _memory_cache[key]
+    store = _get_disk_cache()
+    if store is None:
+        return None
+    try:
+        artifacts = store.get(key)
+    except Exception:
+        return None
+    if artifacts is not None:
+        _remember_artifacts(key, artifacts)
+    return artifacts
+
+
+def _remember_artifacts(key: str, artifacts: Dict[str, Any]) -> None:
+    _memory_cache[key] = artifacts
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > _MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+def _store_artifacts(key: str, artifacts: Dict[str, Any]) -> None:
+    _remember_artifacts(key, artifacts)
+    store = _get_disk_cache()
+    if store is not None:
+        try:
+            store.set(key, artifacts)
+        except Exception:
+            pass
+
 @dataclass
 class ParsedContract:
     """Represents a parsed Solidity contract."""
@@ -27,6 +106,30 @@ class ParsedContract:
     events: List[Dict[str, Any]]
     modifiers: List[Dict[str, Any]]
 
+def source_digest(file_path: Path, source: str, new_hash: Callable[..., Any] = hashlib.sha256) -> str:
+    """
+    Digest (SHA-256 unless new_hash says otherwise) over the file and every
+    relative import it pulls in, so an edited dependency invalidates the
+    cached artifacts of its importers.
+    """
+    h = new_hash(source.encode("utf-8"))
+    seen = {file_path.resolve()}
+    stack = [(file_path, source)]
+    while stack:
+        current, text = stack.pop()
+        for target in _IMPORT_RE.findall(text):
+            if not target.startswith("."):
+                continue
+            dep = (current.parent / target).resolve()
+            if dep in seen or not dep.is_file():
+                continue
+            seen.add(dep)
+            dep_source = dep.read_text(encoding="utf-8")
+            h.update(target.encode("utf-8"))
+            h.update(dep_source.encode("utf-8"))
+            stack.append((dep, dep_source))
+    return h.hexdigest()
+
 class SolidityParser:
     """
     Handles parsing and compilation of Solidity contracts.
@@ -36,22 +139,40 @@ class SolidityParser:
     def __init__(self, debug: bool = False):
         self.debug = debug
         self.default_solc = "0.8.19"
-        if SOLCX_AVAILABLE:
-            self._install_solc(self.default_solc)
-        elif debug:
+        # solc is installed/selected lazily on first compile (see _install_solc)
+        if not SOLCX_AVAILABLE and debug:
             print("[parser] solcx not available - using mock mode")
 
+    def _resolve_version(self, source: str) -> str:
+        """solc version source compiles with: its pragma, else the active or default one"""
+        return self._extract_pragma(source) or _ACTIVE_SOLC or self.default_solc
+
+    def compiler_tag(self, source: str) -> str:
+        """
+        Where parse results for source come from: "mock" without py-solc-x,
+        else the solc version it resolves to. Part of cache keys, so mock
+        results are not served once solcx is installed.
+        """
+        if not SOLCX_AVAILABLE:
+            return "mock"
+        return f"solc-{self._resolve_version(source)}"
+
     def _install_solc(self, version: str):
+        global _ACTIVE_SOLC
         if not SOLCX_AVAILABLE:
             if self.debug:
                 print(f"[parser] mock solc {version} (solcx not installed)")
             return
-        
+
         try:
-            install_solc(version)
-            set_solc_version(version)
-            if self.debug:
-                print(f"[parser] solc {version} ready")
+            if version not in _INSTALLED:
+                install_solc(version)
+                _INSTALLED.add(version)
+            if version != _ACTIVE_SOLC:
+                set_solc_version(version)
+                _ACTIVE_SOLC = version
+                if self.debug:
+                    print(f"[parser] solc {version} ready")
         except Exception as e:
             raise RuntimeError(f"Failed to install solc {version}: {e}")
 
@@ -93,6 +214,89 @@ class SolidityParser:
         # Handle single file
         return [self._parse_single_file(path)]
 
+    def parse_files(self, file_paths: List[str]) -> Dict[str, List[ParsedContract]]:
+        """
+        Parse many .sol files, compiling every uncached file that shares a
+        solc version in a single standard-JSON invocation instead of one
+        solc process per file. Directories are handled by parse_file.
+        """
+        results: Dict[str, List[ParsedContract]] = {}
+        if not SOLCX_AVAILABLE:
+            for fp in file_paths:
+                results[fp] = self.parse_file(fp)
+            return results
+
+        groups: Dict[str, List[Tuple[str, Path, str, str]]] = {}
+        for fp in file_paths:
+            path = Path(fp)
+            if path.is_dir() or not path.exists() or path.suffix != ".sol":
+                results[fp] = self.parse_file(fp)  # raises for bad paths as before
+                continue
+            source = path.read_text(encoding="utf-8")
+            version = self._resolve_version(source)
+            cache_key = f"{source_digest(path, source)}:{version}"
+            cached = _load_artifacts(cache_key)
+            if cached is not None:
+                if self.debug:
+                    print(f"[parser] cache hit: {path}")
+                results[fp] = [ParsedContract(source_code=source, **cached)]
+                continue
+            groups.setdefault(version, []).append((fp, path, source, cache_key))
+
+        for version, group in groups.items():
+            if len(group) == 1:
+                fp, path, _, _ = group[0]
+                results[fp] = [self._parse_single_file(path)]
+                continue
+            self._install_solc(version)
+            try:
+                batch = self._compile_batch(group)
+            except SolcError as e:
+                if self.debug:
+                    print(f"[parser] batch compile failed for solc {version}, compiling per file: {e}")
+                for fp, path, _, _ in group:
+                    results[fp] = [self._parse_single_file(path)]
+                continue
+            for fp, path, source, cache_key in group:
+                artifacts = batch.get(fp)
+                if artifacts is None:
+                    results[fp] = [self._parse_single_file(path)]
+                    continue
+                _store_artifacts(cache_key, artifacts)
+                results[fp] = [ParsedContract(source_code=source, **artifacts)]
+
+        return {fp: results[fp] for fp in file_paths}
+
+    def _compile_batch(self, group: List[Tuple[str, Path, str, str]]) -> Dict[str, Dict[str, Any]]:
+        """One compile_standard call for group; returns artifacts per input path"""
+        units = {str(path.resolve()): fp for fp, path, _, _ in group}
+        output = compile_standard(
+            {
+                "language": "Solidity",
+                "sources": {str(path.resolve()): {"content": source} for _, path, source, _ in group},
+                "settings": {
+                    "outputSelection": {
+                        "*": {"*": ["abi", "evm.bytecode.object"], "": ["ast"]},
+                    },
+                },
+            },
+            # let solc resolve relative imports from disk
+            allow_paths=sorted({str(Path(unit).parent) for unit in units}),
+        )
+        artifacts: Dict[str, Dict[str, Any]] = {}
+        for unit, fp in units.items():
+            contracts = output.get("contracts", {}).get(unit)
+            ast = output.get("sources", {}).get(unit, {}).get("ast")
+            if not contracts or ast is None:
+                continue
+            name, data = next(iter(contracts.items()))
+            artifacts[fp] = self._build_artifacts(name, {
+                "ast": ast,
+                "abi": data.get("abi"),
+                "bin": data.get("evm", {}).get("bytecode", {}).get("object"),
+            })
+        return artifacts
+
     def _parse_single_file(self, file_path: Path) -> ParsedContract:
         """Parse a single .sol file"""
         if not file_path.exists():
@@ -108,9 +312,15 @@ class SolidityParser:
             contract_name = self._extract_contract_name(source) or file_path.stem
             return self._create_mock_contract(contract_name, source)
         
-        pragma = self._extract_pragma(source)
-        if pragma:
-            self._install_solc(pragma)
+        # cache hits never touch solcx, so they work offline
+        version = self._resolve_version(source)
+        cache_key = f"{source_digest(file_path, source)}:{version}"
+        cached = _load_artifacts(cache_key)
+        if cached is not None:
+            if self.debug:
+                print(f"[parser] cache hit: {file_path}")
+            return ParsedContract(source_code=source, **cached)
+        self._install_solc(version)
 
         try:
             compiled = compile_files([str(file_path)], output_values=["abi", "bin", "ast"])
@@ -118,34 +328,22 @@ class SolidityParser:
             raise RuntimeError(f"Compilation failed for {file_path}: {e}")
 
         key, data = next(iter(compiled.items()))
-        contract_name = key.split(":")[-1]
-        ast = data["ast"]
-        abi = data.get("abi")
-        bytecode = data.get("bin")
-
-        functions = self._extract_defs(ast, "FunctionDefinition")
-        events    = self._extract_defs(ast, "EventDefinition")
-        modifiers = self._extract_defs(ast, "ModifierDefinition")
-
-        return ParsedContract(
-            name=contract_name,
-            source_code=source,
-            ast=ast,
-            bytecode=bytecode,
-            abi=abi,
-            functions=functions,
-            events=events,
-            modifiers=modifiers,
-        )
+        artifacts = self._build_artifacts(key.split(":")[-1], data)
+        _store_artifacts(cache_key, artifacts)
+        return ParsedContract(source_code=source, **artifacts)
 
     def parse_source(self, source: str, contract_name: str = "Contract") -> ParsedContract:
         if not SOLCX_AVAILABLE:
             extracted_name = self._extract_contract_name(source) or contract_name
             return self._create_mock_contract(extracted_name, source)
             
-        pragma = self._extract_pragma(source)
-        if pragma:
-            self._install_solc(pragma)
+        version = self._resolve_version(source)
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        cache_key = f"{digest}:{version}"
+        cached = _load_artifacts(cache_key)
+        if cached is not None:
+            return ParsedContract(source_code=source, **cached)
+        self._install_solc(version)
 
         try:
             compiled = compile_source(source, output_values=["abi", "bin", "ast"])
@@ -153,25 +351,23 @@ class SolidityParser:
             raise RuntimeError(f"Compilation failed: {e}")
 
         key, data = next(iter(compiled.items()))
-        name = key.split(":")[-1]
-        ast = data["ast"]
-        abi = data.get("abi")
-        bytecode = data.get("bin")
-
-        functions = self._extract_defs(ast, "FunctionDefinition")
-        events    = self._extract_defs(ast, "EventDefinition")
-        modifiers = self._extract_defs(ast, "ModifierDefinition")
+        artifacts = self._build_artifacts(key.split(":")[-1], data)
+        _store_artifacts(cache_key, artifacts)
+        return ParsedContract(source_code=source, **artifacts)
 
-        return ParsedContract(
-            name=name,
-            source_code=source,
-            ast=ast,
-            bytecode=bytecode,
-            abi=abi,
-            functions=functions,
-            events=events,
-            modifiers=modifiers,
-        )
+    def _build_artifacts(self, name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect the cacheable ParsedContract fields from one solc output entry"""
+        ast = data["ast"]
+        defs = self._extract_all_defs(ast, _DEF_NODE_TYPES)
+        return {
+            "name": name,
+            "ast": ast,
+            "bytecode": data.get("bin"),
+            "abi": data.get("abi"),
+            "functions": defs["FunctionDefinition"],
+            "events": defs["EventDefinition"],
+            "modifiers": defs["ModifierDefinition"],
+        }
 
     def _extract_contract_name(self, source: str) -> Optional[str]:
         """Extract the contract name from Solidity source code"""
@@ -220,25 +416,32 @@ class SolidityParser:
         )
 
     def _extract_pragma(self, src: str) -> Optional[str]:
-        match = re.search(r'pragma\s+solidity\s+[\^~]?(\d+\.\d+\.\d+)', src)
+        # long license headers can push it further down, so fall back to a full scan.
+        # endpos truncates the string, so a head match running up to it may be cut short
+        match = _PRAGMA_RE.search(src, 0, _PRAGMA_HEAD)
+        if match is None or match.end() >= _PRAGMA_HEAD:
+            match = _PRAGMA_RE.search(src)
         return match.group(1) if match else None
 
-    def _extract_defs(self, node: Any, node_type: str) -> List[Dict[str, Any]]:
-        results: List[Dict[str, Any]] = []
-
-        def recurse(n):
+    def _extract_all_defs(self, ast: Any, node_types: frozenset) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Collect definitions of every type in node_types in one iterative
+        walk; deep ASTs no longer hit the recursion limit.
+        """
+        out: Dict[str, List[Dict[str, Any]]] = {t: [] for t in node_types}
+        stack = [ast]
+        while stack:
+            n = stack.pop()
             if isinstance(n, dict):
-                if n.get("nodeType") == node_type:
-                    results.append({
+                nt = n.get("nodeType")
+                if nt in node_types:
+                    out[nt].append({
                         "name": n.get("name", ""),
                         "src": n.get("src", ""),
                         # extend with more fields if needed
                     })
-                for v in n.values():
-                    recurse(v)
+                # reversed so definitions come out in source order
+                stack.extend(reversed(list(n.values())))
             elif isinstance(n, list):
-                for item in n:
-                    recurse(item)
-
-        recurse(node)
-        return results
\ No newline at end of file
+                stack.extend(reversed(n))
+        return out
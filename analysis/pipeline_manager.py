@@ -6,13 +6,24 @@ Handles orchestration of multiple analysis tools and AI models
 import os
 import time
 import asyncio
+import hashlib
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import Iterator, List, Dict, Any, Optional, Set, Tuple, Union
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 from rich.console import Console
 
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    diskcache = None
+    DISKCACHE_AVAILABLE = False
+
 console = Console()
 
+DEFAULT_CACHE_DIR = Path("~/.spoon-audit/cache/pipeline").expanduser()
+
 # ---------------------------
 # Config & Core Manager
 # ---------------------------
@@ -25,18 +36,30 @@ class PipelineConfig:
     timeout_seconds: int = 300
     max_concurrent_tools: int = 3
     retry_attempts: int = 2
+    cache_ttl_seconds: int = 7 * 24 * 3600
 
 
 class PipelineManager:
     """
     Manages the analysis pipeline orchestration
     """
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, cache_dir: Optional[str] = None):
         self.debug = debug
         self.config = PipelineConfig()
         self.console = Console()
+
+        # Persistent parse/static/AI result store (no-op without diskcache)
+        self._store = None
+        if self.config.cache_enabled and DISKCACHE_AVAILABLE:
+            try:
+                self._store = diskcache.Cache(str(cache_dir or DEFAULT_CACHE_DIR))
+            except Exception as e:
+                if self.debug:
+                    console.log(f"[yellow]Cache disabled: {e}[/yellow]")
+
         if self.debug:
             self.console.log("[yellow]PipelineManager initialized (debug ON)[/yellow]")
+            self.console.log(f"[blue]Result cache: {'on' if self._store is not None else 'off'}[/blue]")
 
     async def validate_paths(self, path: str) -> List[str]:
         """
@@ -61,19 +84,37 @@ class PipelineManager:
 
         elif path_obj.is_dir():
             exclude_dirs = {'node_modules', '.git', 'build', 'dist', 'out', 'artifacts', 'cache', '.venv', 'venv'}
-            for sol_file in path_obj.rglob("*.sol"):
-                # Skip excluded directories (any segment)
-                if any(part in exclude_dirs for part in sol_file.parts):
-                    if self.debug:
-                        console.log(f"[yellow]Excluded file: {sol_file}[/yellow]")
-                    continue
-                validated_paths.append(str(sol_file))
+            validated_paths.extend(self._walk_sol(path_obj, exclude_dirs))
 
         validated_paths.sort()
         if self.debug:
             console.log(f"[blue]Total validated .sol paths: {len(validated_paths)}[/blue]")
         return validated_paths
 
+    def _walk_sol(self, root: Path, exclude: Set[str]) -> Iterator[str]:
+        """
+        Yield .sol files under root, pruning excluded directories before
+        descending so their subtrees are never listed.
+        """
+        stack = [str(root)]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError as e:
+                if self.debug:
+                    console.log(f"[yellow]Cannot read directory: {e}[/yellow]")
+                continue
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in exclude:
+                            if self.debug:
+                                console.log(f"[yellow]Excluded directory: {entry.path}[/yellow]")
+                            continue
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".sol"):
+                        yield entry.path
+
     def should_use_parallel(self, tool_count: int, file_count: int) -> bool:
         """Decide if parallel execution should be used based on workload"""
         if not self.config.parallel_execution:
@@ -90,29 +131,75 @@ class PipelineManager:
                 console.log(f"[red]Operation timed out after {timeout} seconds[/red]")
             raise
 
-    def get_cache_key(self, file_path: str, tool: str, file_hash: Optional[str] = None) -> str:
-        """Generate a (currently non-persisted) cache key for analysis results"""
+    def file_hash(self, file_path: str) -> Optional[str]:
+        """SHA-256 of the file content, or None if it cannot be read"""
+        try:
+            return hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+        except (OSError, IOError):
+            return None
+
+    def dependency_hash(self, file_path: str) -> Optional[str]:
+        """
+        Digest of the file and the relative imports it pulls in, for results
+        (parse, static) that change when a dependency does. None if unreadable.
+        """
+        if source_digest is None:
+            return None
+        path = Path(file_path)
+        try:
+            return source_digest(path, path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def get_cache_key(
+        self,
+        file_path: str,
+        tool: str,
+        file_hash: Optional[str] = None,
+        model: str = "-",
+        prompt_version: str = "-",
+    ) -> str:
+        """
+        Generate a cache key for analysis results. Keyed on file content rather
+        than mtime so hits survive fresh checkouts and CI runs.
+        """
         if file_hash is None:
-            try:
-                stat = os.stat(file_path)
-                file_hash = str(int(stat.st_mtime))
-            except (OSError, IOError):
-                file_hash = "unknown"
-        return f"{tool}:{Path(file_path).name}:{file_hash}"
+            file_hash = self.file_hash(file_path) or "unknown"
+        return f"{tool}:{model}:{prompt_version}:{Path(file_path).name}:{file_hash}"
 
     def is_cache_valid(self, cache_key: str) -> bool:
-        """Stub: Always False until a store is wired up"""
-        return self.config.cache_enabled and False
+        """True if a non-expired entry exists for cache_key"""
+        if self._store is None or cache_key.endswith(":unknown"):
+            return False
+        return cache_key in self._store
 
     def get_cached_result(self, cache_key: str) -> Optional[Any]:
-        """Stub: No cache backend yet"""
-        return None
+        """Return the cached result for cache_key, or None on a miss"""
+        if not self.is_cache_valid(cache_key):
+            return None
+        try:
+            result = self._store.get(cache_key)
+        except Exception as e:
+            if self.debug:
+                console.log(f"[yellow]Cache read failed for {cache_key}: {e}[/yellow]")
+            return None
+        if self.debug and result is not None:
+            console.log(f"[green]Cache hit: {cache_key}[/green]")
+        return result
 
     def cache_result(self, cache_key: str, result: Any) -> bool:
-        """Stub: No cache backend yet"""
+        """Persist result under cache_key; returns True if it was stored"""
+        if self._store is None or cache_key.endswith(":unknown"):
+            return False
+        try:
+            self._store.set(cache_key, result, expire=self.config.cache_ttl_seconds)
+        except Exception as e:
+            if self.debug:
+                console.log(f"[yellow]Cache write failed for {cache_key}: {e}[/yellow]")
+            return False
         if self.debug:
-            console.log(f"[blue]Would cache result for key: {cache_key}[/blue]")
-        return self.config.cache_enabled
+            console.log(f"[blue]Cached result for key: {cache_key}[/blue]")
+        return True
 
     async def run_tool_with_retry(self, tool_func, *args, **kwargs) -> Any:
         """Run a tool function with retry + simple backoff"""
@@ -142,7 +229,9 @@ class PipelineManager:
                 "timeout_seconds": self.config.timeout_seconds,
                 "max_concurrent_tools": self.config.max_concurrent_tools,
                 "retry_attempts": self.config.retry_attempts,
+                "cache_ttl_seconds": self.config.cache_ttl_seconds,
             },
+            "cache_backend": "diskcache" if self._store is not None else None,
             "debug_mode": self.debug,
         }
 
@@ -169,13 +258,19 @@ class PipelineManager:
 
 # Lazy imports so this module is importable even if deps are missing
 try:
-    from analysis.parser import SolidityParser
+    from analysis.parser import SolidityParser, source_digest
     from analysis.static_scanner import StaticScanner
-    from analysis.ai_analyzer import AIAnalyzer
+    from analysis.ai_analyzer import AIAnalyzer, IncompleteAnalysisError, PROMPT_VERSION, _summarize_static
 except Exception:
     SolidityParser = None  # type: ignore
+    source_digest = None   # type: ignore
     StaticScanner = None   # type: ignore
     AIAnalyzer = None      # type: ignore
+    PROMPT_VERSION = "-"
+    _summarize_static = None  # type: ignore
+
+    class IncompleteAnalysisError(RuntimeError):  # type: ignore
+        findings: List[Any] = []
 
 
 def _require_components():
@@ -197,30 +292,193 @@ def _as_list(x: Union[Any, List[Any]]) -> List[Any]:
     return [x]
 
 
-async def _parse_and_static(paths: List[str], debug: bool) -> Dict[str, Any]:
+# Worker-local instance so each pool process sets up its scanners only once
+_worker_scanner: Any = None
+
+
+def _scan_one(path: str, debug: bool, tools: List[str]) -> Tuple[Dict[str, List[Any]], List[str]]:
+    """
+    Process-pool entry point: run the given static scanners on a single file.
+    Returns ({tool: [findings]}, tools that errored).
+    """
+    global _worker_scanner
+    if _worker_scanner is None:
+        _worker_scanner = StaticScanner(debug=debug)  # type: ignore
+    results = _worker_scanner.scan(path, tools=tools)
+    return results, list(_worker_scanner.failed_tools)
+
+
+async def _parse_and_static(
+    paths: List[str],
+    debug: bool,
+    pm: Optional[PipelineManager] = None,
+) -> Dict[str, Any]:
     """
-    Parse contracts and run static scanners per path.
+    Parse contracts and run static scanners per path, reusing cached static
+    results from pm for files whose content and relative imports have not
+    changed; they are cached per tool, and a tool that errored is not cached
+    so the next run retries it. Contracts are compiled in batches per solc
+    version on a worker thread (reusing the parser's artifact cache) while
+    the static scans run, spread over a process pool when pm decides the
+    workload is worth it.
 
     Returns:
         {
           "parsed": { path: [ParsedContract, ...] },
-          "static": { path: { tool: [StaticFinding, ...], ... } }
+          "static": { path: { tool: [StaticFinding, ...], ... } },
+          "hashes": { path: sha256 of content }
         }
     """
-    parsed_map: Dict[str, List[Any]] = {}
     static_map: Dict[str, Dict[str, List[Any]]] = {}
+    hashes: Dict[str, Optional[str]] = {}
+    # one cache entry per (file, tool), so a tool that errored is simply rerun
+    static_keys: Dict[str, Dict[str, Optional[str]]] = {}
+    tools = StaticScanner.DEFAULT_TOOLS  # type: ignore
+    missing_tools: Dict[str, List[str]] = {}
 
     for path in paths:
-        # Parse
-        parser = SolidityParser(debug=debug)  # type: ignore
-        parsed_contracts = parser.parse_file(path)
-        parsed_map[path] = _as_list(parsed_contracts)
+        hashes[path] = pm.file_hash(path) if pm else None
+        # static results also depend on the files a contract imports
+        deps = pm.dependency_hash(path) if pm else None
+        static_keys[path] = {
+            tool: pm.get_cache_key(path, f"static-{tool}", deps,
+                                   prompt_version=StaticScanner.VERSION) if pm else None  # type: ignore
+            for tool in tools
+        }
+
+        static_map[path] = {}
+        for tool in tools:
+            cached = pm.get_cached_result(static_keys[path][tool]) if pm else None
+            if cached is not None:
+                static_map[path][tool] = cached
+        missing = [t for t in tools if t not in static_map[path]]
+        if missing:
+            missing_tools[path] = missing
+
+    static_misses = list(missing_tools)
+    loop = asyncio.get_running_loop()
+
+    # solc runs out of process, so a thread is enough to overlap it with scanning.
+    # Parse results are not cached here: parse_files keeps its own artifact
+    # cache keyed on the dependency digest and solc version, and mock-mode
+    # results are cheap to rebuild (and must not outlive solcx being installed)
+    parser = SolidityParser(debug=debug)  # type: ignore
+    parse_job = loop.run_in_executor(None, parser.parse_files, paths)
+
+    try:
+        use_pool = (
+            len(static_misses) > 1
+            and pm is not None
+            and pm.should_use_parallel(tool_count=2, file_count=len(paths))
+        )
+        if use_pool:
+            with ProcessPoolExecutor(max_workers=max(1, pm.config.max_concurrent_tools)) as pool:
+                scans = await asyncio.gather(
+                    *(loop.run_in_executor(pool, _scan_one, p, debug, missing_tools[p])
+                      for p in static_misses)
+                )
+        else:
+            # One scanner per run; constructing one per file repeats tool setup
+            scanner = StaticScanner(debug=debug) if static_misses else None  # type: ignore
+            scans = []
+            for p in static_misses:
+                results = scanner.scan(p, tools=missing_tools[p])
+                scans.append((results, list(scanner.failed_tools)))
+    finally:
+        parsed_new = await parse_job
+
+    parsed_map = {path: _as_list(parsed_new[path]) for path in paths}
+    for path, (scan, failed) in zip(static_misses, scans):
+        static_map[path].update(scan)
+        if pm:
+            for tool, findings in scan.items():
+                # an errored tool reports [], which must not be cached as "no findings"
+                if tool not in failed:
+                    pm.cache_result(static_keys[path][tool], findings)
+    # keep the scanner's tool order regardless of which buckets came from cache
+    static_map = {p: {t: static_map[p][t] for t in tools if t in static_map[p]} for p in paths}
+
+    return {
+        "parsed": {p: parsed_map[p] for p in paths},
+        "static": {p: static_map[p] for p in paths},
+        "hashes": hashes,
+    }
+
+
+def _ai_model_name(ai: Any) -> str:
+    """Model identifier used to key cached AI results"""
+    if getattr(ai, "use_spoon_agent", False):
+        return f"{getattr(ai, 'spoon_agent_type', 'react')}/{getattr(ai, 'spoon_model', '-')}"
+    return getattr(ai, "model_name", "-")
 
-        # Static
-        scanner = StaticScanner(debug=debug)  # type: ignore
-        static_map[path] = scanner.scan(path)  # expects {tool: [findings]}
 
-    return {"parsed": parsed_map, "static": static_map}
+async def _analyze_contracts(
+    ai: Any,
+    pm: PipelineManager,
+    paths: List[str],
+    ps: Dict[str, Any],
+    debug: bool,
+    label: str,
+    cache_tool: str,
+) -> Dict[str, List[Any]]:
+    """
+    Run AI analysis for every (path, contract) pair concurrently, with at most
+    pm.config.max_concurrent_tools requests in flight. Pairs with a cached
+    result for the same prompt inputs, model and prompt version are skipped.
+
+    Returns:
+        { path: [AIFinding, ...] } for paths that produced findings
+    """
+    sem = asyncio.Semaphore(max(1, pm.config.max_concurrent_tools))
+    model = _ai_model_name(ai)
+
+    # Built once per file; every contract in it shares the same static results
+    summaries = {path: _summarize_static(ps["static"].get(path, {})) for path in paths}
+
+    async def _one(path: str, contract: Any, static_ctx: Dict[str, List[Any]]) -> Tuple[str, List[Any]]:
+        # keyed on the prompt inputs: the snippet follows imported files and the
+        # summary follows the static tools, neither of which the file hash covers
+        key = pm.get_cache_key(
+            path, f"{cache_tool}:{contract.name}",
+            ai.prompt_digest(path, contract, static_ctx, summaries[path]),
+            model=model, prompt_version=PROMPT_VERSION,
+        )
+        cached = pm.get_cached_result(key)
+        if cached is not None:
+            return path, cached
+        async with sem:
+            try:
+                findings = await ai.analyze_async(
+                    path, contract, static_ctx, static_summary=summaries[path]
+                )
+            except IncompleteAnalysisError as e:
+                # report what arrived, but leave it uncached so the next run retries
+                if debug:
+                    console.log(f"[yellow]{label}: partial result for {contract.name}: {e}[/yellow]")
+                return path, e.findings
+        # Empty results are not cached: analyze_async also returns [] on failure
+        if findings:
+            pm.cache_result(key, findings)
+        return path, findings
+
+    tasks = [
+        (path, contract, ps["static"].get(path, {}))
+        for path in paths
+        for contract in ps["parsed"].get(path, [])
+    ]
+    # One failing contract must not discard the results of the others
+    results = await asyncio.gather(*(_one(*t) for t in tasks), return_exceptions=True)
+
+    findings_by_path: Dict[str, List[Any]] = {}
+    for (path, contract, _), result in zip(tasks, results):
+        if isinstance(result, Exception):
+            if debug:
+                console.log(f"[red]{label} error for {Path(path).name}:{contract.name}: {result}[/red]")
+            continue
+        _, findings = result
+        if findings:
+            findings_by_path.setdefault(path, []).extend(findings)
+    return findings_by_path
 
 
 def create_pipeline_manager(debug: bool = False) -> PipelineManager:
@@ -250,26 +508,17 @@ async def run_spoon_analysis(
     t0 = time.time()
 
     # Parse + static
-    ps = await _parse_and_static(validated, debug=debug)
+    ps = await _parse_and_static(validated, debug=debug, pm=pm)
 
     # AI (Spoon agent)
     ai = AIAnalyzer(debug=debug, use_spoon_agent=True, spoon_agent_type=agent_type)  # type: ignore
-    findings_by_path: Dict[str, List[Any]] = {}
-    total_findings = 0
-
-    for path in validated:
-        per_contract_findings: List[Any] = []
-        for contract in ps["parsed"].get(path, []):
-            # static context for that path: {tool: [findings]}
-            static_ctx = ps["static"].get(path, {})
-            try:
-                per_contract_findings.extend(ai.analyze(path, contract, static_ctx))
-            except Exception as e:
-                if debug:
-                    console.log(f"[red]AI analysis error for {Path(path).name}: {e}[/red]")
-        if per_contract_findings:
-            findings_by_path[path] = per_contract_findings
-            total_findings += len(per_contract_findings)
+    try:
+        findings_by_path = await _analyze_contracts(
+            ai, pm, validated, ps, debug=debug, label="AI analysis", cache_tool="spoon"
+        )
+    finally:
+        await ai.aclose()
+    total_findings = sum(len(v) for v in findings_by_path.values())
 
     results: Dict[str, Any] = {
         "pipeline": "spoon-powered",
@@ -315,25 +564,96 @@ async def run_openai_analysis(
 
     t0 = time.time()
 
-    ps = await _parse_and_static(validated, debug=debug)
+    ps = await _parse_and_static(validated, debug=debug, pm=pm)
 
     # AI (OpenAI direct)
     ai = AIAnalyzer(debug=debug, use_spoon_agent=False)  # type: ignore
-    findings_by_path: Dict[str, List[Any]] = {}
-    total_findings = 0
+    try:
+        findings_by_path = await _analyze_contracts(
+            ai, pm, validated, ps, debug=debug, label="OpenAI analysis", cache_tool="openai"
+        )
+    finally:
+        await ai.aclose()
+    total_findings = sum(len(v) for v in findings_by_path.values())
 
+    results: Dict[str, Any] = {
+        "pipeline": "openai-powered",
+        "status": "completed",
+        "total_duration": time.time() - t0,
+        "stages": {
+            "parse": {"status": "completed"},
+            "static_full": {"status": "completed"},
+            "ai_single": {
+                "status": "completed",
+                "results": {
+                    "findings": findings_by_path,
+                    "model_stats": {
+                        "engine": "openai",
+                        "contracts_analyzed": len(validated),
+                        "contracts_with_findings": sum(1 for v in findings_by_path.values() if v),
+                        "total_findings": total_findings,
+                    },
+                },
+            },
+        },
+        "summary": {"total_findings": total_findings},
+    }
+    return results
+
+
+async def run_openai_batch_analysis(
+    contract_paths: List[str],
+    debug: bool = False,
+    poll_interval: float = 30.0,
+) -> Dict[str, Any]:
+    """
+    OpenAI Batch API pipeline (half price, results within 24h):
+    validate -> parse -> static scan -> AI (one batch job) -> summary
+    """
+    _require_components()
+    pm = PipelineManager(debug=debug)
+
+    validated: List[str] = []
+    for p in contract_paths:
+        validated.extend(await pm.validate_paths(p))
+    if not validated:
+        raise ValueError("No valid Solidity files found")
+
+    t0 = time.time()
+
+    ps = await _parse_and_static(validated, debug=debug, pm=pm)
+
+    ai = AIAnalyzer(debug=debug, use_spoon_agent=False)  # type: ignore
+    model = _ai_model_name(ai)
+
+    findings_by_path: Dict[str, List[Any]] = {}
+    items = []
+    item_keys = []
     for path in validated:
-        per_contract_findings: List[Any] = []
         for contract in ps["parsed"].get(path, []):
             static_ctx = ps["static"].get(path, {})
-            try:
-                per_contract_findings.extend(ai.analyze(path, contract, static_ctx))
-            except Exception as e:
-                if debug:
-                    console.log(f"[red]OpenAI analysis error for {Path(path).name}: {e}[/red]")
-        if per_contract_findings:
-            findings_by_path[path] = per_contract_findings
-            total_findings += len(per_contract_findings)
+            key = pm.get_cache_key(
+                path, f"openai:{contract.name}", ai.prompt_digest(path, contract, static_ctx),
+                model=model, prompt_version=PROMPT_VERSION,
+            )
+            cached = pm.get_cached_result(key)
+            if cached is not None:
+                findings_by_path.setdefault(path, []).extend(cached)
+                continue
+            items.append((path, contract, static_ctx))
+            item_keys.append(key)
+
+    batch_id = None
+    try:
+        if items:
+            batch_id, batch_findings = await ai.analyze_batch(items, poll_interval=poll_interval)
+            for (path, _, _), key, findings in zip(items, item_keys, batch_findings):
+                if findings:
+                    pm.cache_result(key, findings)
+                    findings_by_path.setdefault(path, []).extend(findings)
+    finally:
+        await ai.aclose()
+    total_findings = sum(len(v) for v in findings_by_path.values())
 
     results: Dict[str, Any] = {
         "pipeline": "openai-powered",
@@ -347,7 +667,8 @@ async def run_openai_analysis(
                 "results": {
                     "findings": findings_by_path,
                     "model_stats": {
-                        "engine": "openai",
+                        "engine": "openai-batch",
+                        "batch_id": batch_id,
                         "contracts_analyzed": len(validated),
                         "contracts_with_findings": sum(1 for v in findings_by_path.values() if v),
                         "total_findings": total_findings,
@@ -378,7 +699,7 @@ async def run_static_only(
         raise ValueError("No valid Solidity files found")
 
     t0 = time.time()
-    ps = await _parse_and_static(validated, debug=debug)
+    ps = await _parse_and_static(validated, debug=debug, pm=pm)
 
     # Count static findings
     total_static = 0
@@ -413,7 +734,8 @@ async def run_pipeline_analysis(
     """
     Compatibility wrapper supporting:
       - "spoon-powered"   (SpoonOS agent via AIAnalyzer)
-      - "openai-powered"  (OpenAI via AIAnalyzer)
+      - "openai-powered"  (OpenAI via AIAnalyzer; custom_config["use_batch"]
+                           submits one Batch API job instead)
       - "static-only"     (no AI)
     """
     custom_config = custom_config or {}
@@ -421,6 +743,12 @@ async def run_pipeline_analysis(
         agent_type = custom_config.get("spoon_agent_type", "react")
         return await run_spoon_analysis(contract_paths, agent_type=agent_type, debug=debug)
     elif pipeline_name == "openai-powered":
+        if custom_config.get("use_batch"):
+            return await run_openai_batch_analysis(
+                contract_paths,
+                debug=debug,
+                poll_interval=custom_config.get("batch_poll_interval", 30.0),
+            )
         return await run_openai_analysis(contract_paths, debug=debug)
     elif pipeline_name == "static-only":
         return await run_static_only(contract_paths, debug=debug)
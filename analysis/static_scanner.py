@@ -22,8 +22,14 @@ class StaticScanner:
     - Basic regex checks
     """
 
+    DEFAULT_TOOLS = ["slither", "mythril", "basic"]
+    # Bump when a tool's checks or output change, so cached findings are dropped
+    VERSION = "1"
+
     def __init__(self, debug: bool = False):
         self.debug = debug
+        # tools that errored (not installed, timed out, bad output) in the last scan()
+        self.failed_tools: List[str] = []
 
     def scan(self, contract_path: str, tools: Optional[List[str]] = None) -> Dict[str, List[StaticFinding]]:
         path = Path(contract_path)
@@ -31,9 +37,10 @@ class StaticScanner:
             raise FileNotFoundError(f"Contract not found: {contract_path}")
 
         # Default tools
-        selected = tools or ["slither", "mythril", "basic"]
+        selected = tools or self.DEFAULT_TOOLS
 
         results: Dict[str, List[StaticFinding]] = {}
+        self.failed_tools = []
         for tool in selected:
             try:
                 if tool == "slither":
@@ -51,51 +58,44 @@ class StaticScanner:
                 if self.debug:
                     print(f"[static] {tool} error: {e}")
                 results[tool] = []
+                self.failed_tools.append(tool)
         return results
 
     def _run_slither(self, path: Path) -> List[StaticFinding]:
         findings: List[StaticFinding] = []
-        try:
-            proc = subprocess.run(
-                ["slither", str(path), "--json", "-"],
-                capture_output=True, text=True, timeout=60
-            )
-            data = json.loads(proc.stdout)
-            for det in data.get("results", {}).get("detectors", []):
-                loc = det.get("elements", [{}])[0].get("source_mapping", {})
-                location = f"{loc.get('filename_short', '')}:{loc.get('lines',[0])[0]}"
-                findings.append(StaticFinding(
-                    tool="slither",
-                    severity=det.get("impact", "Low").lower(),
-                    title=det.get("check", ""),
-                    description=det.get("description", ""),
-                    location=location
-                ))
-        except Exception:
-            if self.debug:
-                print("[static] slither failed or not installed")
+        proc = subprocess.run(
+            ["slither", str(path), "--json", "-"],
+            capture_output=True, text=True, timeout=60
+        )
+        data = json.loads(proc.stdout)
+        for det in data.get("results", {}).get("detectors", []):
+            loc = det.get("elements", [{}])[0].get("source_mapping", {})
+            location = f"{loc.get('filename_short', '')}:{loc.get('lines',[0])[0]}"
+            findings.append(StaticFinding(
+                tool="slither",
+                severity=det.get("impact", "Low").lower(),
+                title=det.get("check", ""),
+                description=det.get("description", ""),
+                location=location
+            ))
         return findings
 
     def _run_mythril(self, path: Path) -> List[StaticFinding]:
         findings: List[StaticFinding] = []
-        try:
-            proc = subprocess.run(
-                ["myth", "analyze", str(path), "--output", "json"],
-                capture_output=True, text=True, timeout=60
-            )
-            data = json.loads(proc.stdout)
-            for issue in data.get("issues", []):
-                findings.append(StaticFinding(
-                    tool="mythril",
-                    severity=issue.get("severity", "Medium").lower(),
-                    title=issue.get("title", ""),
-                    description=issue.get("description", ""),
-                    location=f"{issue.get('filename','')}:{issue.get('lineno',0)}",
-                    line=issue.get("lineno")
-                ))
-        except Exception:
-            if self.debug:
-                print("[static] mythril failed or not installed")
+        proc = subprocess.run(
+            ["myth", "analyze", str(path), "--output", "json"],
+            capture_output=True, text=True, timeout=60
+        )
+        data = json.loads(proc.stdout)
+        for issue in data.get("issues", []):
+            findings.append(StaticFinding(
+                tool="mythril",
+                severity=issue.get("severity", "Medium").lower(),
+                title=issue.get("title", ""),
+                description=issue.get("description", ""),
+                location=f"{issue.get('filename','')}:{issue.get('lineno',0)}",
+                line=issue.get("lineno")
+            ))
         return findings
 
     def _run_basic_checks(self, path: Path) -> List[StaticFinding]:
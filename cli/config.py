@@ -1,9 +1,15 @@
 import os
 import json
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 from rich.console import Console
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 console = Console()
 
 DEFAULT_CONFIG = {
@@ -19,6 +25,20 @@ DEFAULT_CONFIG = {
     }
 }
 
+# Keys answerable straight from the environment, and where each lives in config.json
+_ENV_MAP = {
+    "openai_key": "OPENAI_API_KEY",
+    "spoon_key": "SPOON_API_KEY",
+    "base_url": "SPOON_BASE_URL",
+    "model_name": "SPOON_MODEL",
+}
+_CONFIG_PATHS = {
+    "openai_key": "api_keys.openai",
+    "spoon_key": "api_keys.spoonos",
+    "base_url": "base_url",
+    "model_name": "model_name",
+}
+
 class ConfigManager:
     """
     Handles loading, writing, and updating config.json
@@ -33,15 +53,26 @@ class ConfigManager:
             self.path = config_dir / "config.json"
         else:
             self.path = Path(config_path)
+        # (mtime_ns, size) of config.json alongside the dict parsed from it
+        self._cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
 
     def load(self) -> Dict[str, Any]:
         """Load configuration from file or environment variables"""
         if self.path.exists():
+            st = self.path.stat()
+            key = (st.st_mtime_ns, st.st_size)
+            if self._cache and self._cache[0] == key:
+                return self._cache[1]
             try:
-                return json.loads(self.path.read_text())
+                if ORJSON_AVAILABLE:
+                    cfg = orjson.loads(self.path.read_bytes())
+                else:
+                    cfg = json.loads(self.path.read_text())
             except json.JSONDecodeError as e:
                 console.print(f"[red]Error reading config file: {e}[/red]")
                 return self._load_from_env()
+            self._cache = (key, cfg)
+            return cfg
         
         return self._load_from_env()
 
@@ -68,12 +99,16 @@ class ConfigManager:
 
     def write(self, data: Dict[str, Any]) -> None:
         """Write configuration to file"""
+        self._cache = None
         try:
             # Ensure directory exists
             self.path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(self.path, "w") as f:
-                json.dump(data, f, indent=2)
+            if ORJSON_AVAILABLE:
+                self.path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(self.path, "w") as f:
+                    json.dump(data, f, indent=2)
         except Exception as e:
             console.print(f"[red]Error writing config file: {e}[/red]")
             raise
@@ -86,7 +121,10 @@ class ConfigManager:
         display_cfg = self._mask_sensitive_data(cfg)
         
         console.print("[blue]Current Configuration:[/blue]")
-        console.print(json.dumps(display_cfg, indent=2))
+        if ORJSON_AVAILABLE:
+            console.print(orjson.dumps(display_cfg, option=orjson.OPT_INDENT_2).decode())
+        else:
+            console.print(json.dumps(display_cfg, indent=2))
         console.print(f"\n[dim]Config file location: {self.path}[/dim]")
 
     def _mask_sensitive_data(self, cfg: Dict[str, Any]) -> Dict[str, Any]:
@@ -103,6 +141,19 @@ class ConfigManager:
         
         return masked_cfg
 
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Fast lookup for common keys (see _ENV_MAP): a set environment variable
+        wins and config.json is only read when it is missing. Other keys are
+        resolved like get_setting.
+        """
+        env_var = _ENV_MAP.get(key)
+        if env_var:
+            value = os.getenv(env_var)
+            if value:
+                return value
+        return self.get_setting(_CONFIG_PATHS.get(key, key), default)
+
     def get_api_key(self, provider: str) -> str:
         """Get API key for a specific provider"""
         cfg = self.load()
@@ -3,35 +3,268 @@ Spoon Audit CLI - AI‑Powered Smart Contract Audit Assistant
 Enhanced version with complete AI analysis details and multi-contract support
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import json
 import time
+import hashlib
+import pickle
+import dataclasses
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional, List, Tuple
 
 import click
 from dotenv import load_dotenv
 from rich.console import Console
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.panel import Panel
-from rich.columns import Columns
-from rich.text import Text
-from rich.markdown import Markdown
-
-from analysis.parser import SolidityParser, ParsedContract
-from analysis.static_scanner import StaticScanner, StaticFinding
-from analysis.ai_analyzer import AIAnalyzer, AIFinding
+
 from cli.config import ConfigManager
 
+# The analysis stack (openai in particular) and most of rich are imported
+# inside the commands that need them, keeping --help/config/report fast
+if TYPE_CHECKING:
+    from analysis.parser import SolidityParser, ParsedContract
+    from analysis.static_scanner import StaticScanner, StaticFinding
+    from analysis.ai_analyzer import AIFinding
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
 # Globals
 REPORT_PATH = os.getenv("REPORT_PATH", "last_report.json")
+LARGE_REPORT_ROWS = 1000  # above this, report prints findings as CSV instead of a table
+LARGE_REPORT_BYTES = 5 * 1024 * 1024  # above this, report streams findings from disk
+AST_CACHE_PATH = Path("~/.spoon-audit/ast-cache.pkl").expanduser()
 console = Console()
 
+CacheEntry = Tuple[List["ParsedContract"], Dict[str, List["StaticFinding"]]]
+
+class AstCache:
+    """
+    Parsed contracts and static findings per .sol file, reused while the
+    digest of the file and its relative imports is unchanged and persisted
+    between CLI runs. Holds at most max_entries files, least recently used
+    first out; entries for deleted files are dropped on save.
+    """
+    MAX_ENTRIES = 256
+
+    def __init__(self, path: Path = AST_CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.dirty = False
+        # insertion order doubles as recency order
+        self._entries: Dict[str, Tuple[str, CacheEntry]] = {}
+        try:
+            with open(self.path, "rb") as f:
+                self._entries = pickle.load(f)
+        except Exception:
+            self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, file_path: str, digest: str) -> Optional[CacheEntry]:
+        key = str(Path(file_path).resolve())
+        entry = self._entries.get(key)
+        if entry and entry[0] == digest:
+            self._entries[key] = self._entries.pop(key)
+            return entry[1]
+        return None
+
+    def put(self, file_path: str, digest: str, parsed: List[ParsedContract],
+            static: Dict[str, List[StaticFinding]]) -> None:
+        key = str(Path(file_path).resolve())
+        self._entries.pop(key, None)
+        self._entries[key] = (digest, (parsed, static))
+        self.dirty = True
+
+    def invalidate(self, file_path: str) -> None:
+        if self._entries.pop(str(Path(file_path).resolve()), None) is not None:
+            self.dirty = True
+
+    def prune(self) -> None:
+        """Drop entries for files that no longer exist, then the oldest beyond max_entries"""
+        stale = [k for k in self._entries if not os.path.exists(k)]
+        excess = max(0, len(self._entries) - len(stale) - self.max_entries)
+        stale += [k for k in self._entries if k not in stale][:excess]
+        for k in stale:
+            del self._entries[k]
+        if stale:
+            self.dirty = True
+
+    def save(self) -> None:
+        self.prune()
+        if not self.dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(self._entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except Exception as e:
+            console.log(f"[yellow]Could not save AST cache: {e}[/yellow]")
+
+_ast_cache: Optional[AstCache] = None
+
+def get_ast_cache() -> AstCache:
+    """Process-wide AstCache, so repeated scans from `watch` share it"""
+    global _ast_cache
+    if _ast_cache is None:
+        _ast_cache = AstCache()
+    return _ast_cache
+
+def content_digest(data: bytes) -> bytes:
+    """Fast change-detection hash; BLAKE3 when installed, else SHA-256"""
+    if BLAKE3_AVAILABLE:
+        return blake3(data).digest()
+    return hashlib.sha256(data).digest()
+
+def file_digest(file_path: Path) -> str:
+    """
+    AstCache key of a file: content digest of the file and its relative
+    imports, tagged with the parser mode/solc version and the static
+    scanner version
+    """
+    from analysis.parser import SolidityParser, source_digest
+    from analysis.static_scanner import StaticScanner
+    path = Path(file_path)
+    data = path.read_bytes()
+    try:
+        source = data.decode("utf-8")
+        digest = source_digest(path, source,
+                               new_hash=blake3 if BLAKE3_AVAILABLE else hashlib.sha256)
+        compiler = SolidityParser().compiler_tag(source)
+    except (OSError, UnicodeDecodeError):
+        digest, compiler = content_digest(data).hex(), "-"
+    return f"{digest}:{compiler}:{StaticScanner.VERSION}"
+
+# One parser/scanner per process; pool workers build their own on first use
+_parser: Optional[SolidityParser] = None
+_scanner: Optional[StaticScanner] = None
+
+def _parse_worker(file_path: Path, debug: bool) -> Tuple[Optional[List[ParsedContract]], Optional[Exception]]:
+    """Parse one file; errors are returned so one bad file doesn't abort the batch"""
+    global _parser
+    if _parser is None:
+        from analysis.parser import SolidityParser
+        _parser = SolidityParser(debug=debug)
+    try:
+        return _parser.parse_file(str(file_path)), None
+    except Exception as e:
+        return None, e
+
+def _scan_worker(file_path: Path, debug: bool, tools: List[str]) -> Tuple[Dict[str, List[StaticFinding]], List[str]]:
+    """Run the given tools on one file; returns (findings per tool, tools that errored)"""
+    global _scanner
+    if _scanner is None:
+        from analysis.static_scanner import StaticScanner
+        _scanner = StaticScanner(debug=debug)
+    results = _scanner.scan(str(file_path), tools=tools)
+    return results, list(_scanner.failed_tools)
+
+def find_sol_files(path: str) -> List[Path]:
+    """Files scanned for PATH, matching SolidityParser.parse_file's discovery"""
+    root = Path(path)
+    if not root.is_dir():
+        return [root]
+    return sorted(root.glob("*.sol")) or sorted(root.rglob("*.sol"))
+
+# Vendored and VCS trees are never scanned, at any depth below the watched path
+WATCH_IGNORED_DIRS = frozenset({".git", "node_modules"})
+
+def make_change_handler(root: str, on_change: Callable[[List[str]], None], debounce: float = 0.2) -> Any:
+    """
+    watchdog handler for `watch` on root: collects modified .sol files, waits for
+    events to settle, and calls on_change with the files whose content
+    actually changed. Calls never overlap; saves that land mid-scan are
+    picked up by the next one.
+    """
+    import threading
+    from watchdog.events import PatternMatchingEventHandler
+    root_path = Path(root)
+
+    class ChangeHandler(PatternMatchingEventHandler):
+        def __init__(self):
+            # watchdog drops non-.sol paths and directories before dispatching to us
+            super().__init__(patterns=["*.sol"], ignore_directories=True)
+            self._lock = threading.Lock()
+            # held for the whole of on_change, so rescans run one at a time
+            self._scan_lock = threading.Lock()
+            self._pending: set = set()
+            self._timer: Optional[threading.Timer] = None
+            # content digest of each file as of the last scan it triggered
+            self._hashes: Dict[str, bytes] = {}
+
+        def dispatch(self, event):
+            # watchdog's ignore_patterns match from the right, so they only cover
+            # direct children of an ignored directory; check every path component
+            src = Path(event.src_path)
+            try:
+                src = src.relative_to(root_path)
+            except ValueError:
+                pass
+            if WATCH_IGNORED_DIRS.intersection(src.parts):
+                return
+            super().dispatch(event)
+
+        def on_modified(self, event):
+            with self._lock:
+                self._pending.add(event.src_path)
+                if self._timer:
+                    self._timer.cancel()
+                self._timer = threading.Timer(debounce, self._rescan)
+                self._timer.daemon = True
+                self._timer.start()
+
+        def _rescan(self):
+            with self._scan_lock:
+                with self._lock:
+                    pending, self._pending = self._pending, set()
+                    if self._timer is threading.current_thread():
+                        self._timer = None
+                changed = []
+                for src_path in sorted(pending):
+                    try:
+                        digest = content_digest(Path(src_path).read_bytes())
+                    except OSError:
+                        self._hashes.pop(src_path, None)
+                        changed.append(src_path)
+                        continue
+                    # touch/metadata-only events leave the content as it was
+                    if self._hashes.get(src_path) != digest:
+                        self._hashes[src_path] = digest
+                        changed.append(src_path)
+                if changed:
+                    on_change(changed)
+
+    return ChangeHandler()
+
 @click.group()
 @click.version_option(version="0.1.0")
 @click.option("--debug", is_flag=True, help="Enable debug mode")
@@ -58,11 +291,14 @@ def scan(ctx: click.Context, path: str, no_ai: bool, detailed: bool, spoon_agent
 
     PATH can be a single .sol file or a directory of contracts.
     """
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+    from analysis.ai_analyzer import AIAnalyzer
+    from analysis.static_scanner import StaticScanner
+
     debug = ctx.obj["debug"]
     console.print(f"[blue]🔍 Scanning:[/blue] {path}")
 
-    parser         = SolidityParser(debug=debug)
-    static_scanner = StaticScanner(debug=debug)
     ai_analyzer = AIAnalyzer(
     debug=debug,
     use_spoon_agent=bool(spoon_agent),
@@ -70,21 +306,89 @@ def scan(ctx: click.Context, path: str, no_ai: bool, detailed: bool, spoon_agent
 )
 
 
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as prog:
-        # 1. Parse - Now returns a list of contracts
+    # no live spinner (and no refresh thread) when output is piped or on CI
+    quiet = not console.is_terminal or bool(os.environ.get("CI"))
+    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"),
+                  console=console, disable=quiet) as prog:
+        # 1. Parse - files whose content is unchanged come from the AST cache
         task = prog.add_task("Parsing code...", total=None)
-        parsed_contracts: List[ParsedContract] = parser.parse_file(path)
-        prog.update(task, completed=True)
-        
-        # Show parsing results
-        if len(parsed_contracts) > 1:
-            console.print(f"[cyan]📄 Found {len(parsed_contracts)} contracts:[/cyan]")
-            for contract in parsed_contracts:
-                console.print(f"  • {contract.name}")
+        cache = get_ast_cache()
+        files = find_sol_files(path)
+        digests = {f: file_digest(f) for f in files}
+        cached = {f: cache.get(str(f), digests[f]) for f in files}
+        if debug:
+            hits = sum(1 for c in cached.values() if c is not None)
+            console.log(f"[blue]AST cache: {hits}/{len(files)} file(s) unchanged[/blue]")
+
+        # Directories with several changed files fan out across cores;
+        # a single file skips the pool's startup cost. Workers are spawned,
+        # not forked: watch calls scan from its timer thread, and forking a
+        # threaded process can leave a child stuck on a copied lock.
+        misses = [f for f in files if cached[f] is None]
+        pool = (
+            ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+            if Path(path).is_dir() and len(misses) > 1 else None
+        )
+
+        def run(worker: Any, targets: List[Path], *args: Iterable[Any]) -> Iterable[Any]:
+            if pool:
+                return pool.map(worker, targets, repeat(debug), *args)
+            return map(worker, targets, repeat(debug), *args)
+
+        try:
+            parsed_by_file: Dict[Path, List[ParsedContract]] = {}
+            for f in files:
+                if cached[f] is not None:
+                    parsed_by_file[f] = cached[f][0]
+            for f, (parsed, error) in zip(misses, run(_parse_worker, misses)):
+                if error is None:
+                    parsed_by_file[f] = parsed
+                    continue
+                if len(files) == 1:
+                    raise error
+                if debug:
+                    console.log(f"[yellow]Failed to parse {f}: {error}[/yellow]")
+            if not parsed_by_file:
+                raise RuntimeError(f"Failed to parse any .sol files in: {path}")
+            parsed_contracts: List[ParsedContract] = [
+                c for f in files for c in parsed_by_file.get(f, [])
+            ]
+            prog.update(task, completed=True)
+
+            # Show parsing results
+            if len(parsed_contracts) > 1:
+                console.print(f"[cyan]📄 Found {len(parsed_contracts)} contracts:[/cyan]")
+                for contract in parsed_contracts:
+                    console.print(f"  • {contract.name}")
+
+            # 2. Static analysis - per file, merged into one {tool: [findings]} dict.
+            # Tools that errored last time were not cached, so cached files rerun just those
+            task = prog.add_task("Running static analysis...", total=None)
+            tools = StaticScanner.DEFAULT_TOOLS
+            todo = {
+                f: [t for t in tools if cached[f] is None or t not in cached[f][1]]
+                for f in files
+            }
+            targets = [f for f in files if todo[f]]
+            scanned = dict(zip(targets, run(_scan_worker, targets, [todo[f] for f in targets])))
+        finally:
+            if pool:
+                pool.shutdown()
 
-        # 2. Static analysis
-        task = prog.add_task("Running static analysis...", total=None)
-        static_results = static_scanner.scan(path)
+        static_results: Dict[str, List[StaticFinding]] = {}
+        for f in files:
+            file_static = dict(cached[f][1]) if cached[f] is not None else {}
+            failed: List[str] = []
+            if f in scanned:
+                results, failed = scanned[f]
+                file_static.update(results)
+                if f in parsed_by_file:
+                    # an errored tool reports [], which must not be cached as "no findings"
+                    cache.put(str(f), digests[f], parsed_by_file[f],
+                              {t: v for t, v in file_static.items() if t not in failed})
+            for tool in tools:
+                static_results.setdefault(tool, []).extend(file_static.get(tool, []))
+        cache.save()
         prog.update(task, completed=True)
 
         # 3. AI analysis - Pass all contracts
@@ -98,56 +402,26 @@ def scan(ctx: click.Context, path: str, no_ai: bool, detailed: bool, spoon_agent
             prog.update(task, completed=True)
 
     # 4. Save detailed report with contract information
-    report = {
-        "path": path,
-        "timestamp": int(time.time()),
-        "contracts": [
-            {
-                "name": contract.name,
-                "functions_count": len(contract.functions),
-                "events_count": len(contract.events),
-                "modifiers_count": len(contract.modifiers),
-                "has_bytecode": contract.bytecode is not None,
-                "has_abi": contract.abi is not None
-            }
-            for contract in parsed_contracts
-        ],
-        "static": [
-            {
-                "tool": f.tool, 
-                "severity": f.severity, 
-                "title": f.title, 
-                "location": f.location,
-                "description": getattr(f, 'description', ''),
-                "suggestion": getattr(f, 'suggestion', ''),
-                "contract": getattr(f, 'contract', '')  # Add contract context if available
-            }
-            for findings in static_results.values() for f in findings
-        ],
-        "ai": [
-            {
-                "severity": f.severity, 
-                "title": f.title, 
-                "description": f.description,
-                "location": f.location, 
-                "confidence": f.confidence,
-                "reasoning": f.reasoning,
-                "suggested_fix": f.suggested_fix,
-                "contract": getattr(f, 'contract', '')  # Add contract context if available
-            }
-            for f in ai_results
-        ],
-    }
-    
-    with open(REPORT_PATH, "w") as f:
-        json.dump(report, f, indent=2)
+    contracts_info = [
+        {
+            "name": contract.name,
+            "functions_count": len(contract.functions),
+            "events_count": len(contract.events),
+            "modifiers_count": len(contract.modifiers),
+            "has_bytecode": contract.bytecode is not None,
+            "has_abi": contract.abi is not None
+        }
+        for contract in parsed_contracts
+    ]
+    payload = _serialize_report(path, int(time.time()), contracts_info, static_results, ai_results)
+    write_report(REPORT_PATH, payload)
 
     console.print(f"[green]✅ Scan complete! Report saved to[/green] {REPORT_PATH}")
     
     # Show summary with contract info
     contract_count = len(parsed_contracts)
-    static_count = len(report["static"])
-    ai_count = len(report["ai"])
+    static_count = sum(len(findings) for findings in static_results.values())
+    ai_count = len(ai_results)
     
     console.print(f"[cyan]📊 Analyzed {contract_count} contract(s), found {static_count} static findings and {ai_count} AI findings[/cyan]")
     
@@ -171,39 +445,43 @@ def scan(ctx: click.Context, path: str, no_ai: bool, detailed: bool, spoon_agent
     
     # Show detailed results if requested
     if detailed:
-        show_detailed_report(report)
+        show_detailed_report(orjson.loads(payload) if ORJSON_AVAILABLE else json.loads(payload))
 
 @main.command()
 @click.argument("path", type=click.Path(exists=True))
-@click.option("--interval", "-i", default=10, help="Watch interval in seconds")
+@click.option("--interval", "-i", default=10,
+              help="Polling interval in seconds (only used with --polling)")
+@click.option("--polling", is_flag=True, default=False,
+              help="Poll for changes instead of using OS file events (e.g. network mounts)")
 @click.pass_context
-def watch(ctx: click.Context, path: str, interval: int):
+def watch(ctx: click.Context, path: str, interval: int, polling: bool):
     """
     Watch a contract file or directory and re-run scan on changes.
     """
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
-
-    console.print(f"[blue]👁️  Watching:[/blue] {path} every {interval}s")
+    if polling:
+        from watchdog.observers.polling import PollingObserver as Observer
+        console.print(f"[blue]👁️  Watching:[/blue] {path} (polling every {interval}s)")
+    else:
+        from watchdog.observers import Observer
+        console.print(f"[blue]👁️  Watching:[/blue] {path}")
 
-    class ChangeHandler(FileSystemEventHandler):
-        def on_modified(self, event):
-            if event.src_path.endswith(".sol"):
-                console.print(f"[yellow]🔄 Change detected:[/yellow] {event.src_path}")
-                ctx.invoke(scan, path=path, no_ai=True)
+    def on_change(changed: List[str]) -> None:
+        for src_path in changed:
+            console.print(f"[yellow]🔄 Change detected:[/yellow] {src_path}")
+            get_ast_cache().invalidate(src_path)
+        ctx.invoke(scan, path=path, no_ai=True)
 
-    handler = ChangeHandler()
-    observer = Observer()
+    handler = make_change_handler(path, on_change)
+    observer = Observer(timeout=interval) if polling else Observer()
     observer.schedule(handler, path, recursive=True)
     observer.start()
 
     try:
-        while True:
-            time.sleep(interval)
+        observer.join()
     except KeyboardInterrupt:
         observer.stop()
+        observer.join()
         console.print("[red]🛑 Stopped watching[/red]")
-    observer.join()
 
 @main.command()
 @click.option("--show", is_flag=True, help="Display current config (config.json or .env)")
@@ -220,13 +498,7 @@ def config(show: bool, set_kv: Optional[list]):
 
     if set_kv:
         key, value = set_kv
-        cfg = mgr.load()
-        parts = key.split(".")
-        d = cfg
-        for p in parts[:-1]:
-            d = d.setdefault(p, {})
-        d[parts[-1]] = value
-        mgr.write(cfg)
+        mgr.set_setting(key, value)
         console.print(f"[green]✅ Updated config.json: set {key}[/green]")
         return
 
@@ -249,7 +521,7 @@ def report(detailed: bool, ai_only: bool, static_only: bool, severity: Optional[
         console.print(f"[red]⚠️  No report found at[/red] {REPORT_PATH}")
         sys.exit(1)
 
-    data = json.loads(report_file.read_text())
+    data = load_report(report_file, stream=True)
     
     if detailed:
         show_detailed_report(data, ai_only=ai_only, static_only=static_only, 
@@ -258,10 +530,97 @@ def report(detailed: bool, ai_only: bool, static_only: bool, severity: Optional[
         show_summary_report(data, ai_only=ai_only, static_only=static_only, 
                           severity_filter=severity, contract_filter=contract)
 
+def _serialize_report(path: str, timestamp: int, contracts: List[dict],
+                      static_results: Dict[str, List[StaticFinding]],
+                      ai_results: List[AIFinding]) -> bytes:
+    """
+    Encode the scan report, 2-space indented, in one dumps call; the finding
+    dataclasses are serialized directly rather than copied into dicts first.
+    """
+    report = {
+        "path": path,
+        "timestamp": timestamp,
+        "contracts": contracts,
+        "static": [f for findings in static_results.values() for f in findings],
+        "ai": ai_results,
+    }
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            report,
+            option=orjson.OPT_SERIALIZE_DATACLASS | orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE,
+        )
+    return (json.dumps(report, default=dataclasses.asdict, indent=2) + "\n").encode("utf-8")
+
+def write_report(report_path: str, payload: bytes) -> None:
+    """Write the encoded report with raw fd writes, skipping the buffered file layer"""
+    fd = os.open(report_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+class StreamedFindings:
+    """Findings array of a report file, re-parsed lazily with ijson on each iteration"""
+    def __init__(self, report_file: Path, prefix: str):
+        self.report_file = report_file
+        self.prefix = prefix
+
+    def __iter__(self):
+        with open(self.report_file, "rb") as f:
+            yield from ijson.items(f, self.prefix, use_float=True)
+
+    def __bool__(self) -> bool:
+        items = iter(self)
+        try:
+            return next(items, None) is not None
+        finally:
+            items.close()
+
+def _stream_report(report_file: Path) -> dict:
+    # header fields are written before the findings, so each lookup stops early
+    data = {}
+    for key in ("path", "timestamp", "contracts"):
+        with open(report_file, "rb") as f:
+            data[key] = next(ijson.items(f, key, use_float=True), None)
+    data["static"] = StreamedFindings(report_file, "static.item")
+    data["ai"] = StreamedFindings(report_file, "ai.item")
+    return data
+
+def load_report(report_file: Path, stream: bool = False) -> dict:
+    """
+    Read a saved scan report. With stream=True, reports over LARGE_REPORT_BYTES
+    keep their findings on disk and are parsed as they are iterated.
+    """
+    if stream and IJSON_AVAILABLE and report_file.stat().st_size > LARGE_REPORT_BYTES:
+        return _stream_report(report_file)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(report_file.read_bytes())
+    return json.loads(report_file.read_text())
+
+@functools.lru_cache(maxsize=1)
+def format_timestamp(ts: float) -> str:
+    """Human-readable report timestamp; every view of one report shares the same ts"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+def print_csv(headers: List[str], rows: Iterable[Iterable[str]]) -> None:
+    """Plain CSV to stdout for tables too large to render with Rich"""
+    import csv
+    console.file.flush()
+    writer = csv.writer(sys.stdout)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    sys.stdout.flush()
+
+_STATIC_ROW = itemgetter("tool", "severity", "title", "location")
+_AI_ROW = itemgetter("severity", "title", "location")
+
 def show_summary_report(data: dict, ai_only: bool = False, static_only: bool = False, 
                        severity_filter: Optional[str] = None, contract_filter: Optional[str] = None):
     """Show a summary report in table format"""
-    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["timestamp"]))
+    from rich.table import Table
+    ts = format_timestamp(data["timestamp"])
     console.print(f"[bold]📄 Last Report:[/bold] {data['path']}  ([green]{ts}[/green])\n")
 
     # Show contract summary if multiple contracts
@@ -292,20 +651,33 @@ def show_summary_report(data: dict, ai_only: bool = False, static_only: bool = F
 
     # Static results table
     if not ai_only and data.get("static"):
-        static_findings = [f for f in data["static"] if should_include(f)]
-        if static_findings:
+        static_findings = (f for f in data["static"] if should_include(f))
+        multi_contract = len(data.get("contracts", [])) > 1
+        if multi_contract:
+            rows = ((*_STATIC_ROW(f), f.get("contract", "N/A")) for f in static_findings)
+        else:
+            rows = map(_STATIC_ROW, static_findings)
+        # findings streamed from a huge report go straight to CSV without being held in memory
+        streamed = not isinstance(data["static"], list)
+        if not streamed:
+            rows = list(rows)
+
+        if streamed or len(rows) > LARGE_REPORT_ROWS:
+            # Rich lays out every cell before printing; that dominates on huge reports
+            headers = ["tool", "severity", "title", "location"] + (["contract"] if multi_contract else [])
+            console.print("[bold]Static Analysis Findings[/bold] (CSV)")
+            print_csv(headers, rows)
+            console.print()
+        elif rows:
             static_table = Table(title="Static Analysis Findings")
             static_table.add_column("Tool", style="cyan")
             static_table.add_column("Severity", style="magenta")
             static_table.add_column("Title", style="yellow")
-            static_table.add_column("Location", style="green")
-            if len(data.get("contracts", [])) > 1:
+            static_table.add_column("Location", style="green", no_wrap=True)
+            if multi_contract:
                 static_table.add_column("Contract", style="blue")
             
-            for f in static_findings:
-                row = [f["tool"], f["severity"], f["title"], f["location"]]
-                if len(data.get("contracts", [])) > 1:
-                    row.append(f.get("contract", "N/A"))
+            for row in rows:
                 static_table.add_row(*row)
             console.print(static_table)
             console.print()
@@ -313,21 +685,23 @@ def show_summary_report(data: dict, ai_only: bool = False, static_only: bool = F
     # AI results table
     if not static_only and data.get("ai"):
         ai_findings = [f for f in data["ai"] if should_include(f)]
+        multi_contract = len(data.get("contracts", [])) > 1
         if ai_findings:
             ai_table = Table(title="AI Analysis Findings")
             ai_table.add_column("Severity", style="magenta")
             ai_table.add_column("Title", style="yellow")
-            ai_table.add_column("Location", style="green")
+            ai_table.add_column("Location", style="green", no_wrap=True)
             ai_table.add_column("Confidence", style="cyan")
-            if len(data.get("contracts", [])) > 1:
+            if multi_contract:
                 ai_table.add_column("Contract", style="blue")
             
             for f in ai_findings:
-                confidence_str = f"{f['confidence']:.1f}" if isinstance(f['confidence'], (int, float)) else str(f['confidence'])
-                row = [f["severity"], f["title"], f["location"], confidence_str]
-                if len(data.get("contracts", [])) > 1:
-                    row.append(f.get("contract", "N/A"))
-                ai_table.add_row(*row)
+                confidence = f["confidence"]
+                confidence_str = f"{confidence:.1f}" if isinstance(confidence, (int, float)) else str(confidence)
+                if multi_contract:
+                    ai_table.add_row(*_AI_ROW(f), confidence_str, f.get("contract", "N/A"))
+                else:
+                    ai_table.add_row(*_AI_ROW(f), confidence_str)
             console.print(ai_table)
             console.print()
 
@@ -343,7 +717,7 @@ def show_summary_report(data: dict, ai_only: bool = False, static_only: bool = F
 def show_detailed_report(data: dict, ai_only: bool = False, static_only: bool = False, 
                         severity_filter: Optional[str] = None, contract_filter: Optional[str] = None):
     """Show detailed report with full finding information"""
-    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["timestamp"]))
+    ts = format_timestamp(data["timestamp"])
     console.print(f"[bold]📄 Detailed Report:[/bold] {data['path']}  ([green]{ts}[/green])\n")
 
     # Show contract summary if multiple contracts
@@ -383,6 +757,7 @@ def show_detailed_report(data: dict, ai_only: bool = False, static_only: bool =
 
 def show_detailed_static_finding(finding: dict, index: int, show_contract: bool = False):
     """Show detailed view of a static analysis finding"""
+    from rich.panel import Panel
     severity_colors = {
         "critical": "red",
         "high": "red", 
@@ -427,6 +802,7 @@ def show_detailed_static_finding(finding: dict, index: int, show_contract: bool
 
 def show_detailed_ai_finding(finding: dict, index: int, show_contract: bool = False):
     """Show detailed view of an AI analysis finding"""
+    from rich.panel import Panel
     severity_colors = {
         "critical": "red",
         "high": "red",
@@ -496,7 +872,7 @@ def export(output_format: str, output: Optional[str], open_browser: bool, contra
         console.print(f"[red]⚠️  No report found at[/red] {REPORT_PATH}")
         sys.exit(1)
 
-    data = json.loads(report_file.read_text())
+    data = load_report(report_file)
     
     # Apply contract filter if specified
     if contract:
@@ -553,7 +929,7 @@ def export_json(data: dict, output_file: str):
 
 def export_markdown(data: dict, output_file: str):
     """Export report as Markdown"""
-    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["timestamp"]))
+    ts = format_timestamp(data["timestamp"])
     
     md_content = f"""# Spoon Audit Report
 
@@ -619,7 +995,7 @@ def export_markdown(data: dict, output_file: str):
 
 def export_html(data: dict, output_file: str, open_browser: bool = False):
     """Export report as enhanced HTML"""
-    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["timestamp"]))
+    ts = format_timestamp(data["timestamp"])
     contract_count = len(data.get('contracts', []))
     
     # Enhanced CSS with modern styling
@@ -1286,7 +1662,7 @@ def export_pdf(data: dict, output_file: str):
         story.append(Spacer(1, 20))
         
         # Contract info
-        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["timestamp"]))
+        ts = format_timestamp(data["timestamp"])
         info_text = f"<b>Contract Path:</b> {html.escape(data['path'])}<br/>" \
                    f"<b>Analysis Date:</b> {ts}<br/>" \
                    f"<b>Contracts:</b> {len(data.get('contracts', []))}<br/>" \
@@ -1383,7 +1759,7 @@ def export_pdf(data: dict, output_file: str):
                    fontsize=20, weight='bold', ha='center')
             
             # Summary info
-            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["timestamp"]))
+            ts = format_timestamp(data["timestamp"])
             summary_text = f"""Contract Path: {data['path']}
 Analysis Date: {ts}
 Contracts Analyzed: {len(data.get('contracts', []))}
@@ -1,23 +1,12 @@
 # tests/conftest.py
-import sys
+# analysis and cli are importable via the editable install (pip install -e .)
 from pathlib import Path
 
-# Add the project root to Python path so we can import analysis and cli modules
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
-# Optional: Add some common test fixtures here
 import pytest
 
-@pytest.fixture
-def sample_contract_path():
-    """Fixture providing a path to a sample contract for testing"""
-    return str(project_root / "tests" / "fixtures" / "sample.sol")
+TESTS_DIR = Path(__file__).parent
 
-@pytest.fixture
-def sample_contract_content():
-    """Fixture providing sample Solidity contract content"""
-    return """
+_SAMPLE_BYTES = b"""
 pragma solidity ^0.8.0;
 
 contract Sample {
@@ -33,4 +22,15 @@ contract Sample {
         payable(to).transfer(address(this).balance);
     }
 }
-"""
\ No newline at end of file
+"""
+_SAMPLE_CONTENT = _SAMPLE_BYTES.decode()
+
+@pytest.fixture(scope="session")
+def sample_contract_path():
+    """Fixture providing a path to a sample contract for testing"""
+    return str(TESTS_DIR / "fixtures" / "sample.sol")
+
+@pytest.fixture(scope="session")
+def sample_contract_content():
+    """Fixture providing sample Solidity contract content"""
+    return _SAMPLE_CONTENT
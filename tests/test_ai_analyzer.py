@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from analysis.static_scanner import StaticScanner, StaticFinding
 import tempfile
@@ -24,3 +25,241 @@ def test_basic_checks(tmp_path):
     findings = results["basic"]
     assert any(isinstance(f, StaticFinding) for f in findings)
     assert any("tx.origin" in f.description or "Use of tx.origin" in f.title for f in findings)
+
+def test_call_with_retry_recovers_from_transient_errors(monkeypatch):
+    import asyncio
+    from analysis import ai_analyzer
+
+    monkeypatch.setattr(ai_analyzer, "RETRYABLE_ERRORS", (ConnectionError,))
+    analyzer = ai_analyzer.AIAnalyzer()
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("transient")
+        return "ok"
+
+    assert asyncio.run(analyzer._call_with_retry(flaky, base_delay=0)) == "ok"
+    assert len(calls) == 3
+
+    async def always_down():
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(analyzer._call_with_retry(always_down, attempts=2, base_delay=0))
+
+def test_token_bucket_throttles_once_budget_is_spent():
+    import asyncio
+    import time
+    from analysis.ai_analyzer import AsyncTokenBucket
+
+    # 600 rpm -> one request refilled every 0.1s once the initial burst is used
+    bucket = AsyncTokenBucket(rpm=600)
+
+    async def consume(n):
+        for _ in range(n):
+            await bucket.consume(1)
+
+    start = time.monotonic()
+    asyncio.run(consume(602))
+    assert time.monotonic() - start >= 0.15
+
+def test_rate_limits_tolerate_blank_and_invalid_env(monkeypatch):
+    from analysis import ai_analyzer
+
+    for raw in ("", "  ", "abc", "-5", "0"):
+        monkeypatch.setenv("OPENAI_RPM", raw)
+        monkeypatch.setenv("OPENAI_TPM", raw)
+        assert ai_analyzer.AIAnalyzer()._bucket is None
+    monkeypatch.setenv("OPENAI_RPM", " 60 ")
+    assert ai_analyzer._env_limit("OPENAI_RPM") == 60
+    assert ai_analyzer.AIAnalyzer()._bucket is not None
+
+def test_async_client_is_only_opened_when_needed(monkeypatch):
+    from analysis import ai_analyzer
+
+    if not ai_analyzer.OPENAI_V1:
+        pytest.skip("openai>=1.0 not installed")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(ai_analyzer, "ConfigManager", None)
+    analyzer = ai_analyzer.AIAnalyzer()
+    # sync-only callers such as the CLI scan never open a pool
+    assert analyzer.openai_client is not None
+    assert analyzer.aclient is None and analyzer._http is None
+
+    client = analyzer._async_client()
+    assert client is not None and analyzer._async_client() is client
+    assert analyzer._http is not None
+    asyncio.run(analyzer.aclose())
+    assert analyzer.aclient is None and analyzer._http is None
+
+def test_finding_scanner_emits_objects_as_they_close():
+    from analysis.ai_analyzer import _FindingScanner
+
+    scanner = _FindingScanner()
+    assert scanner.feed('```json\n[{"title": "a [1] {x}"}') == [{"title": "a [1] {x}"}]
+    assert scanner.feed(', {"title": "b"') == []
+    assert scanner.feed('}]\n```') == [{"title": "b"}]
+    assert scanner.done
+
+def test_parse_openai_response_accepts_structured_and_free_form_output():
+    from analysis.ai_analyzer import AIAnalyzer
+
+    analyzer = AIAnalyzer()
+    structured = '{"findings": [{"severity": "HIGH", "title": "Reentrancy", "suggested_fix": null}]}'
+    free_form = 'Here you go:\n```json\n[{"severity": "low", "title": "Gas"}]\n```'
+
+    assert [f.severity for f in analyzer._parse_openai_response(structured)] == ["high"]
+    assert [f.title for f in analyzer._parse_openai_response(free_form)] == ["Gas"]
+
+def test_prompt_digest_follows_static_summary():
+    from analysis.ai_analyzer import AIAnalyzer
+    from analysis.parser import ParsedContract
+
+    analyzer = AIAnalyzer()
+    contract = ParsedContract("A", "contract A {}", {}, None, None, [], [], [])
+    found = {"basic": [StaticFinding("basic", "high", "tx.origin", "", "A.sol:1", 1)]}
+
+    base = analyzer.prompt_digest("A.sol", contract, {})
+    assert analyzer.prompt_digest("A.sol", contract, {}) == base
+    # e.g. slither comes back after being missing
+    assert analyzer.prompt_digest("A.sol", contract, found) != base
+
+class _Chunk:
+    def __init__(self, text):
+        delta = type("Delta", (), {"content": text})()
+        self.choices = [type("Choice", (), {"delta": delta})()]
+
+class _FakeStream:
+    def __init__(self, pieces, error=None):
+        self.pieces, self.error = list(pieces), error
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.pieces:
+            return _Chunk(self.pieces.pop(0))
+        if self.error:
+            raise self.error
+        raise StopAsyncIteration
+
+    async def close(self):
+        pass
+
+def _fake_openai(analyzer, make_stream):
+    calls = []
+
+    async def create(**request):
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return make_stream()
+
+    completions = type("Completions", (), {"create": staticmethod(create)})()
+    analyzer.aclient = type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+    return calls
+
+def test_analyze_async_flags_a_stream_that_breaks_off():
+    from analysis import ai_analyzer
+    from analysis.parser import ParsedContract
+
+    analyzer = ai_analyzer.AIAnalyzer()
+    contract = ParsedContract("A", "contract A {}", {}, None, None, [], [], [])
+    first = '{"findings": [{"severity": "high", "title": "Reentrancy"}, '
+    _fake_openai(analyzer, lambda: _FakeStream([first], ConnectionError("reset")))
+
+    with pytest.raises(ai_analyzer.IncompleteAnalysisError) as info:
+        asyncio.run(analyzer.analyze_async("A.sol", contract, {}))
+    assert [f.title for f in info.value.findings] == ["Reentrancy"]
+
+    # a response that simply stops before the array closes is just as incomplete
+    _fake_openai(analyzer, lambda: _FakeStream([first]))
+    with pytest.raises(ai_analyzer.IncompleteAnalysisError):
+        asyncio.run(analyzer.analyze_async("A.sol", contract, {}))
+
+def test_analyze_async_shares_one_request_per_prompt():
+    from analysis import ai_analyzer
+    from analysis.parser import ParsedContract
+
+    analyzer = ai_analyzer.AIAnalyzer()
+    contract = ParsedContract("A", "contract A {}", {}, None, None, [], [], [])
+    body = '{"findings": [{"severity": "high", "title": "Reentrancy"}]}'
+    calls = _fake_openai(analyzer, lambda: _FakeStream([body]))
+
+    async def twice():
+        return await asyncio.gather(
+            analyzer.analyze_async("A.sol", contract, {}),
+            analyzer.analyze_async("A.sol", contract, {}),
+        )
+
+    first, second = asyncio.run(twice())
+    assert len(calls) == 1
+    assert [f.title for f in first] == [f.title for f in second] == ["Reentrancy"]
+    # each caller owns its copy
+    first[0].title = "changed"
+    assert second[0].title == "Reentrancy" and first[0] is not second[0]
+    assert analyzer._inflight == {}
+
+def test_cancelled_waiter_leaves_shared_analysis_running():
+    from analysis import ai_analyzer
+    from analysis.parser import ParsedContract
+
+    analyzer = ai_analyzer.AIAnalyzer()
+    contract = ParsedContract("A", "contract A {}", {}, None, None, [], [], [])
+    body = '{"findings": [{"severity": "low", "title": "Gas"}]}'
+    calls = _fake_openai(analyzer, lambda: _FakeStream([body]))
+
+    async def cancel_one():
+        quitter = asyncio.ensure_future(analyzer.analyze_async("A.sol", contract, {}))
+        stayer = asyncio.ensure_future(analyzer.analyze_async("A.sol", contract, {}))
+        await asyncio.sleep(0.01)
+        quitter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await quitter
+        return await stayer
+
+    assert [f.title for f in asyncio.run(cancel_one())] == ["Gas"]
+    assert len(calls) == 1
+
+def test_only_schema_errors_disable_structured_output():
+    from analysis.ai_analyzer import AIAnalyzer
+
+    analyzer = AIAnalyzer()
+    analyzer._structured_output = True
+    request = analyzer._openai_request("prompt")
+    too_long = ValueError("This model's maximum context length is 8192 tokens")
+    assert not analyzer._drop_structured_output(request, too_long)
+    assert analyzer._structured_output and "response_format" in request
+
+    unsupported = ValueError("Invalid parameter: 'response_format' of type 'json_schema' is not supported")
+    assert analyzer._drop_structured_output(request, unsupported)
+    assert not analyzer._structured_output and "response_format" not in request
+
+def test_slice_relevant_keeps_only_flagged_functions():
+    from analysis.ai_analyzer import _slice_relevant
+
+    src = (
+        "pragma solidity ^0.8.0;\n"
+        "contract A {\n"
+        "    function safe() public {}\n"
+        "    function risky() public {\n"
+        "        require(tx.origin == msg.sender);\n"
+        "    }\n"
+        "}\n"
+    )
+    safe, risky = src.index("function safe"), src.index("function risky")
+    functions = [
+        {"name": "safe", "src": f"{safe}:{len('function safe() public {}')}:0"},
+        {"name": "risky", "src": f"{risky}:{src.index('}', risky + 30) + 1 - risky}:0"},
+    ]
+    flagged = {"basic": [StaticFinding("basic", "high", "tx.origin", "", "A.sol:5", 5)]}
+
+    snippet = _slice_relevant(src, functions, flagged)
+    assert snippet.startswith("function risky") and "safe" not in snippet
+    # a finding at the same line of another file does not select A's functions
+    other = {"basic": [StaticFinding("basic", "high", "tx.origin", "", "B.sol:5", 5)]}
+    assert _slice_relevant(src, functions, other, contract_path="contracts/A.sol") == src[:2500]
+    assert _slice_relevant(src, functions, flagged, contract_path="contracts/A.sol") == snippet
+    # nothing to map onto: fall back to the head of the file
+    assert _slice_relevant(src, functions, {}, budget=10) == src[:10]
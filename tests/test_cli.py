@@ -0,0 +1,123 @@
+from cli import main as cli_main
+
+SAMPLE_SOL = """
+pragma solidity ^0.8.0;
+contract {name} {{
+    function foo() public {{}}
+}}
+"""
+
+def test_file_digest_changes_with_imported_files(tmp_path):
+    dep = tmp_path / "B.sol"
+    dep.write_text(SAMPLE_SOL.format(name="B"))
+    sol = tmp_path / "A.sol"
+    sol.write_text('import "./B.sol";\n' + SAMPLE_SOL.format(name="A"))
+
+    before = cli_main.file_digest(sol)
+    assert cli_main.file_digest(sol) == before
+    dep.write_text(SAMPLE_SOL.format(name="B2"))
+    assert cli_main.file_digest(sol) != before
+
+def test_file_digest_changes_once_solc_is_available(tmp_path, monkeypatch):
+    from analysis import parser
+
+    sol = tmp_path / "A.sol"
+    sol.write_text(SAMPLE_SOL.format(name="A"))
+    monkeypatch.setattr(parser, "SOLCX_AVAILABLE", False)
+    mock = cli_main.file_digest(sol)
+    monkeypatch.setattr(parser, "SOLCX_AVAILABLE", True)
+    compiled = cli_main.file_digest(sol)
+    assert mock != compiled and ":solc-0.8.0:" in compiled
+
+def test_ast_cache_roundtrip_and_pruning(tmp_path):
+    files = []
+    for name in "ABC":
+        f = tmp_path / f"{name}.sol"
+        f.write_text(SAMPLE_SOL.format(name=name))
+        files.append(f)
+    store = tmp_path / "ast-cache.pkl"
+
+    cache = cli_main.AstCache(store, max_entries=2)
+    for f in files:
+        cache.put(str(f), "d1", [], {"basic": []})
+    assert cache.get(str(files[0]), "d1") == ([], {"basic": []})
+    assert cache.get(str(files[0]), "d2") is None
+    cache.save()
+
+    # B is the least recently used once A was read back
+    reloaded = cli_main.AstCache(store, max_entries=2)
+    assert len(reloaded) == 2
+    assert reloaded.get(str(files[1]), "d1") is None
+    assert reloaded.get(str(files[0]), "d1") is not None
+
+    # entries for deleted files go on the next save
+    files[0].unlink()
+    reloaded.save()
+    assert len(cli_main.AstCache(store)) == 1
+
+def test_change_handler_ignores_vendored_trees_at_any_depth(tmp_path):
+    import time
+    from watchdog.events import FileModifiedEvent
+
+    seen = []
+    handler = cli_main.make_change_handler(str(tmp_path), seen.extend, debounce=0.01)
+    own = tmp_path / "contracts" / "A.sol"
+    own.parent.mkdir()
+    own.write_text(SAMPLE_SOL.format(name="A"))
+    for src in (
+        tmp_path / "node_modules" / "@oz" / "contracts" / "token" / "ERC20.sol",
+        tmp_path / ".git" / "x" / "y.sol",
+        tmp_path / "contracts" / "README.md",
+        own,
+    ):
+        handler.dispatch(FileModifiedEvent(str(src)))
+    time.sleep(0.2)
+    assert seen == [str(own)]
+
+def test_change_handler_never_overlaps_rescans(tmp_path):
+    import threading
+    import time
+    from watchdog.events import FileModifiedEvent
+
+    sol = tmp_path / "A.sol"
+    sol.write_text(SAMPLE_SOL.format(name="A"))
+    state = {"running": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def slow_scan(changed):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.3)
+        with lock:
+            state["running"] -= 1
+            state["calls"] += 1
+
+    handler = cli_main.make_change_handler(str(tmp_path), slow_scan, debounce=0.01)
+    handler.dispatch(FileModifiedEvent(str(sol)))
+    time.sleep(0.1)
+    # saved again while the first scan is still running
+    sol.write_text(SAMPLE_SOL.format(name="B"))
+    handler.dispatch(FileModifiedEvent(str(sol)))
+    time.sleep(0.8)
+    assert state == {"running": 0, "peak": 1, "calls": 2}
+
+def test_report_matches_indented_json():
+    import json
+    from dataclasses import asdict
+    from analysis.ai_analyzer import AIFinding
+    from analysis.static_scanner import StaticFinding
+
+    static = {"basic": [StaticFinding("basic", "high", "tx.origin", "d", "A.sol:5", 5)], "slither": []}
+    ai = [AIFinding("low", "Gas", "d", "A:1", 0.5, "r")]
+    contracts = [{"name": "A", "functions_count": 1}]
+
+    payload = cli_main._serialize_report("contracts", 1700000000, contracts, static, ai)
+    expected = {
+        "path": "contracts",
+        "timestamp": 1700000000,
+        "contracts": contracts,
+        "static": [asdict(f) for f in static["basic"]],
+        "ai": [asdict(f) for f in ai],
+    }
+    assert bytes(payload) == (json.dumps(expected, indent=2) + "\n").encode("utf-8")
@@ -35,3 +35,111 @@ def test_parse_source_and_file(tmp_path):
     assert parsed_src.name == "Test"
     assert parsed_src.bytecode is not None
     assert isinstance(parsed_src.ast, dict)
+
+def test_extract_pragma_across_head_limit():
+    from analysis.parser import _PRAGMA_HEAD
+
+    parser = SolidityParser()
+    src = "// " + "x" * 485 + "\n" + SAMPLE_SOL.replace("^0.8.0", "^0.8.19")
+    assert src.index("pragma") < _PRAGMA_HEAD < src.index("0.8.19") + len("0.8.19")
+    assert parser._extract_pragma(src) == "0.8.19"
+    assert parser._extract_pragma(SAMPLE_SOL) == "0.8.0"
+
+def test_cache_hit_skips_solc_install(tmp_path, monkeypatch):
+    from analysis import parser as P
+
+    def offline(version):
+        raise OSError("no network")
+
+    def fake_compile(files, output_values):
+        return {f"{files[0]}:Test": {"abi": [], "bin": "00", "ast": {"nodeType": "SourceUnit"}}}
+
+    monkeypatch.setattr(P, "SOLCX_AVAILABLE", True)
+    monkeypatch.setattr(P, "_INSTALLED", set())
+    monkeypatch.setattr(P, "_ACTIVE_SOLC", None)
+    monkeypatch.setattr(P, "_memory_cache", type(P._memory_cache)())
+    monkeypatch.setattr(P, "_disk_cache", False)
+    monkeypatch.setattr(P, "install_solc", lambda version: None, raising=False)
+    monkeypatch.setattr(P, "set_solc_version", lambda version: None, raising=False)
+    monkeypatch.setattr(P, "compile_files", fake_compile, raising=False)
+    sol_file = tmp_path / "Test.sol"
+    sol_file.write_text(SAMPLE_SOL)
+
+    parser = P.SolidityParser()
+    assert parser.parse_file(str(sol_file))[0].name == "Test"
+    # a fresh process with nothing installed and no network still hits the cache
+    monkeypatch.setattr(P, "_INSTALLED", set())
+    monkeypatch.setattr(P, "_ACTIVE_SOLC", None)
+    monkeypatch.setattr(P, "install_solc", offline, raising=False)
+    assert parser.parse_file(str(sol_file))[0].name == "Test"
+
+def _unit_ast(name):
+    fn = {"nodeType": "FunctionDefinition", "name": f"set{name}", "src": "0:1:0"}
+    return {"nodeType": "SourceUnit", "nodes": [{"nodeType": "ContractDefinition", "name": name, "nodes": [fn]}]}
+
+def _offline_solc(P, monkeypatch):
+    monkeypatch.setattr(P, "SOLCX_AVAILABLE", True)
+    monkeypatch.setattr(P, "_INSTALLED", set())
+    monkeypatch.setattr(P, "_ACTIVE_SOLC", None)
+    monkeypatch.setattr(P, "_memory_cache", type(P._memory_cache)())
+    monkeypatch.setattr(P, "_disk_cache", False)
+    monkeypatch.setattr(P, "install_solc", lambda version: None, raising=False)
+    monkeypatch.setattr(P, "set_solc_version", lambda version: None, raising=False)
+
+def test_parse_files_batches_one_solc_call(tmp_path, monkeypatch):
+    from analysis import parser as P
+
+    calls = []
+
+    def fake_standard(input_json, allow_paths=None):
+        calls.append(sorted(input_json["sources"]))
+        out = {"contracts": {}, "sources": {}}
+        for unit in input_json["sources"]:
+            name = Path(unit).stem
+            out["contracts"][unit] = {name: {"abi": [name], "evm": {"bytecode": {"object": name.lower()}}}}
+            out["sources"][unit] = {"ast": _unit_ast(name)}
+        return out
+
+    _offline_solc(P, monkeypatch)
+    monkeypatch.setattr(P, "compile_standard", fake_standard, raising=False)
+    paths = []
+    for name in ("A", "B", "C"):
+        f = tmp_path / f"{name}.sol"
+        f.write_text(SAMPLE_SOL.replace("Test", name))
+        paths.append(str(f))
+
+    results = P.SolidityParser().parse_files(paths)
+    assert len(calls) == 1 and len(calls[0]) == 3
+    assert list(results) == paths
+    for fp, name in zip(paths, "ABC"):
+        contract, = results[fp]
+        assert (contract.name, contract.abi, contract.bytecode) == (name, [name], name.lower())
+        assert contract.ast == _unit_ast(name)
+        assert [fn["name"] for fn in contract.functions] == [f"set{name}"]
+        assert f"contract {name}" in contract.source_code
+
+def test_parse_files_falls_back_per_file_on_solc_error(tmp_path, monkeypatch):
+    from analysis import parser as P
+
+    compiled = []
+
+    def broken_standard(input_json, allow_paths=None):
+        raise P.SolcError("batch failed")
+
+    def fake_compile(files, output_values):
+        compiled.append(files[0])
+        name = Path(files[0]).stem
+        return {f"{files[0]}:{name}": {"abi": [], "bin": "00", "ast": _unit_ast(name)}}
+
+    _offline_solc(P, monkeypatch)
+    monkeypatch.setattr(P, "compile_standard", broken_standard, raising=False)
+    monkeypatch.setattr(P, "compile_files", fake_compile, raising=False)
+    paths = []
+    for name in ("A", "B"):
+        f = tmp_path / f"{name}.sol"
+        f.write_text(SAMPLE_SOL.replace("Test", name))
+        paths.append(str(f))
+
+    results = P.SolidityParser().parse_files(paths)
+    assert compiled == paths
+    assert [results[fp][0].name for fp in paths] == ["A", "B"]
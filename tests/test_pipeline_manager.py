@@ -0,0 +1,130 @@
+import asyncio
+import pytest
+from analysis import pipeline_manager
+from analysis.ai_analyzer import AIFinding
+
+SAMPLE_SOL = """
+pragma solidity ^0.8.0;
+contract {name} {{
+    function foo() public {{}}
+}}
+"""
+
+class FakeAnalyzer:
+    """Stands in for AIAnalyzer; each call sleeps to simulate network latency"""
+    in_flight = 0
+    peak = 0
+
+    def __init__(self, **kwargs):
+        self.closed = False
+
+    def prompt_digest(self, contract_path, parsed, static_results, static_summary=None):
+        return f"{parsed.name}:{static_summary}"
+
+    async def analyze_async(self, contract_path, parsed, static_results, static_summary=None):
+        FakeAnalyzer.in_flight += 1
+        FakeAnalyzer.peak = max(FakeAnalyzer.peak, FakeAnalyzer.in_flight)
+        await asyncio.sleep(0.05)
+        FakeAnalyzer.in_flight -= 1
+        return [AIFinding("high", parsed.name, "", contract_path, 0.9, "")]
+
+    async def aclose(self):
+        self.closed = True
+
+def test_openai_analysis_runs_contracts_concurrently(tmp_path, monkeypatch):
+    for name in ("A", "B", "C", "D"):
+        (tmp_path / f"{name}.sol").write_text(SAMPLE_SOL.format(name=name))
+    monkeypatch.setattr(pipeline_manager, "AIAnalyzer", FakeAnalyzer)
+    monkeypatch.setattr(pipeline_manager, "DEFAULT_CACHE_DIR", tmp_path / "cache")
+    FakeAnalyzer.peak = 0
+
+    results = asyncio.run(pipeline_manager.run_openai_analysis([str(tmp_path)]))
+
+    findings = results["stages"]["ai_single"]["results"]["findings"]
+    assert results["summary"]["total_findings"] == 4
+    assert sorted(findings) == sorted(str(tmp_path / f"{n}.sol") for n in "ABCD")
+    # bounded by PipelineConfig.max_concurrent_tools
+    assert 1 < FakeAnalyzer.peak <= 3
+
+def test_cache_is_keyed_on_content(tmp_path):
+    sol = tmp_path / "A.sol"
+    sol.write_text(SAMPLE_SOL.format(name="A"))
+    pm = pipeline_manager.PipelineManager(cache_dir=str(tmp_path / "cache"))
+
+    key = pm.get_cache_key(str(sol), "parse")
+    assert pm.get_cached_result(key) is None
+    if not pipeline_manager.DISKCACHE_AVAILABLE:
+        assert pm.cache_result(key, ["parsed"]) is False
+        pytest.skip("diskcache not installed")
+
+    assert pm.cache_result(key, ["parsed"])
+    assert pm.get_cached_result(key) == ["parsed"]
+    # touching the file keeps the key; editing it does not
+    sol.write_text(SAMPLE_SOL.format(name="A"))
+    assert pm.get_cache_key(str(sol), "parse") == key
+    sol.write_text(SAMPLE_SOL.format(name="B"))
+    assert pm.get_cache_key(str(sol), "parse") != key
+
+def test_static_cache_tracks_imports_and_skips_failed_tools(tmp_path, monkeypatch):
+    pytest.importorskip("diskcache")
+    calls = []
+
+    class FakeScanner:
+        DEFAULT_TOOLS = ["slither", "basic"]
+        VERSION = "test"
+
+        def __init__(self, debug=False):
+            self.failed_tools = []
+
+        def scan(self, path, tools=None):
+            calls.append(tuple(tools))
+            # slither "times out" and reports nothing
+            self.failed_tools = [t for t in tools if t == "slither"]
+            return {t: [] for t in tools}
+
+    class FakeParser:
+        def __init__(self, debug=False):
+            pass
+
+        def parse_files(self, paths):
+            return {p: [] for p in paths}
+
+    monkeypatch.setattr(pipeline_manager, "StaticScanner", FakeScanner)
+    monkeypatch.setattr(pipeline_manager, "SolidityParser", FakeParser)
+    (tmp_path / "B.sol").write_text(SAMPLE_SOL.format(name="B"))
+    a = tmp_path / "A.sol"
+    a.write_text('import "./B.sol";\n' + SAMPLE_SOL.format(name="A"))
+    pm = pipeline_manager.PipelineManager(cache_dir=str(tmp_path / "cache"))
+
+    def run():
+        calls.clear()
+        asyncio.run(pipeline_manager._parse_and_static([str(a)], debug=False, pm=pm))
+        return calls[:]
+
+    assert run() == [("slither", "basic")]
+    # basic is cached; the failed slither run is retried
+    assert run() == [("slither",)]
+    # editing the imported file invalidates A's cached results
+    (tmp_path / "B.sol").write_text(SAMPLE_SOL.format(name="B2"))
+    assert run() == [("slither", "basic")]
+
+def test_partial_ai_results_are_reported_but_not_cached(tmp_path, monkeypatch):
+    pytest.importorskip("diskcache")
+    from analysis.ai_analyzer import IncompleteAnalysisError
+
+    class BrokenStreamAnalyzer(FakeAnalyzer):
+        calls = 0
+
+        async def analyze_async(self, contract_path, parsed, static_results, static_summary=None):
+            BrokenStreamAnalyzer.calls += 1
+            partial = [AIFinding("high", parsed.name, "", contract_path, 0.9, "")]
+            raise IncompleteAnalysisError("stream broke off", partial)
+
+    (tmp_path / "A.sol").write_text(SAMPLE_SOL.format(name="A"))
+    monkeypatch.setattr(pipeline_manager, "AIAnalyzer", BrokenStreamAnalyzer)
+    monkeypatch.setattr(pipeline_manager, "DEFAULT_CACHE_DIR", tmp_path / "cache")
+
+    for expected_calls in (1, 2):
+        results = asyncio.run(pipeline_manager.run_openai_analysis([str(tmp_path)]))
+        assert results["summary"]["total_findings"] == 1
+        assert BrokenStreamAnalyzer.calls == expected_calls